@@ -1,5 +1,6 @@
 from pydantic import BaseSettings
 import os
+from typing import Optional
 
 class Settings(BaseSettings):
     supabase_url: str
@@ -7,8 +8,23 @@ class Settings(BaseSettings):
     supabase_service_role_key: str
     supabase_jwt_secret: str
     supabase_storage_bucket: str = "workbench"
+    supabase_read_url: Optional[str] = None
 
     groq_api_key: str
+    llm_base_url: str = "https://api.groq.com/openai/v1"
+    llm_model: str = "llama-3.3-70b-versatile"
+    llm_temperature: float = 0.2
+    llm_max_tokens: int = 1024
+    llm_context_window: int = 131072
+    llm_connect_timeout_seconds: float = 5.0
+    llm_read_timeout_seconds: float = 60.0
+    llm_max_retries: int = 3
+    llm_retry_base_seconds: float = 0.5
+    llm_retry_max_seconds: float = 8.0
+    llm_retry_after_max_seconds: float = 30.0
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_http2: bool = True
 
     razorpay_key_id: str
     razorpay_key_secret: str
@@ -16,6 +32,82 @@ class Settings(BaseSettings):
 
     redis_url: str = "redis://redis:6379/0"
 
+    database_url: Optional[str] = None
+    db_pool_min_size: int = 2
+    db_pool_max_size: int = 10
+    db_statement_cache_size: int = 1024
+    db_command_timeout_seconds: float = 30.0
+    db_max_inactive_connection_lifetime: float = 300.0
+    database_replica_urls: Optional[str] = None
+    db_replica_selection: str = "least_busy"
+    db_replica_max_lag_seconds: float = 5.0
+    db_replica_lag_check_interval_seconds: float = 10.0
+
+    embedding_model_version: str = "placeholder-random-1536"
+    embedding_cache_size: int = 2048
+    embedding_cache_ttl_seconds: int = 3600
+    embedding_cache_use_redis: bool = False
+
+    retrieval_cache_enabled: bool = True
+    retrieval_cache_size: int = 1024
+    retrieval_cache_ttl_seconds: int = 600
+    index_version_ttl_seconds: float = 5.0
+
+    vector_index_enabled: bool = False
+    vector_index_max_chunks: int = 50000
+    vector_index_memory_mb: int = 1024
+    vector_snapshot_dir: Optional[str] = None
+    vector_filter_ef_search: int = 200
+    vector_overfetch_factor: float = 2.0
+
+    binary_quant_enabled: bool = True
+    binary_quant_min_chunks: int = 1000000
+    binary_quant_candidates: int = 400
+
+    bm25_index_enabled: bool = True
+    bm25_index_max_chunks: int = 100000
+    bm25_index_memory_mb: int = 256
+
+    rerank_enabled: bool = False
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_top_n: int = 20
+    rerank_budget_ms: float = 150.0
+    rerank_workers: int = 1
+
+    search_fanout_concurrency: int = 4
+    retrieval_deadline_ms: float = 1500.0
+
+    identifier_search_enabled: bool = True
+    identifier_weight: float = 1.0
+
+    mmr_enabled: bool = False
+    mmr_lambda: float = 0.7
+    mmr_candidates: int = 20
+
+    context_token_budget: int = 3000
+
+    conversation_memory_enabled: bool = True
+    conversation_memory_turns: int = 6
+    conversation_memory_token_budget: int = 1000
+    conversation_summary_token_budget: int = 300
+
+    write_behind_workers: int = 4
+    write_behind_queue_size: int = 10000
+    write_behind_max_attempts: int = 3
+    write_behind_drain_timeout_seconds: float = 10.0
+
+    usage_meter_buffered: bool = True
+    usage_meter_flush_interval_seconds: float = 5.0
+    usage_meter_use_redis: bool = False
+
+    partition_maintenance_interval_seconds: float = 3600.0
+
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_size: int = 256
+    semantic_cache_max_workbenches: int = 1000
+    semantic_cache_ttl_seconds: int = 1800
+
     app_env: str = "prod"
     log_level: str = "info"
 
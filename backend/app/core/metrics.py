@@ -0,0 +1,40 @@
+import threading
+from typing import Dict, Any, Optional
+
+class Metrics:
+    """Minimal in-process counters and gauges exposed via /api/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its latest value"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name: str) -> float:
+        """Read a counter or gauge value"""
+        with self._lock:
+            return self._counters.get(name, self._gauges.get(name, 0))
+
+    def ratio(self, numerator: str, denominator_names: tuple) -> Optional[float]:
+        """Compute numerator / sum(denominators), e.g. a cache hit rate"""
+        with self._lock:
+            total = sum(self._counters.get(name, 0) for name in denominator_names)
+            if not total:
+                return None
+            return self._counters.get(numerator, 0) / total
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of all counters and gauges"""
+        with self._lock:
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges)}
+
+metrics = Metrics()
@@ -5,7 +5,7 @@ from fastapi.responses import JSONResponse
 import structlog
 from .core import config
 from .core.errors import validation_exception_handler, http_exception_handler, general_exception_handler
-from .routers import health, workbenches, companies, chat, reports, agents
+from .routers import health, workbenches, companies, chat, reports, agents, search
 
 # Configure structured logging
 structlog.configure(
@@ -54,15 +54,55 @@ app.include_router(companies.router, prefix="/api", tags=["companies"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(reports.router, prefix="/api", tags=["reports"])
 app.include_router(agents.router, prefix="/api", tags=["agents"])
+app.include_router(search.router, prefix="/api", tags=["search"])
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up Sync Talk Kit API")
 
+    from .services.supabase_client import supabase_client
+    try:
+        await supabase_client.init_pool()
+    except Exception as e:
+        # Keep serving; /api/readyz reports the database as unavailable until a retry succeeds
+        logger.error("Error initializing database pool", error=str(e))
+
+    if config.settings.rerank_enabled:
+        from .services.reranker import get_reranker
+        await get_reranker().warmup()
+
+    from .services.write_behind import get_write_behind
+    get_write_behind().start()
+
+    from .services.usage_meter import get_usage_meter
+    get_usage_meter().start()
+
+    from .workers.partition_maintenance import get_partition_maintenance
+    get_partition_maintenance().start()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Sync Talk Kit API")
 
+    # Flush queued writes while the database clients are still open
+    from .services.write_behind import get_write_behind
+    await get_write_behind().drain(config.settings.write_behind_drain_timeout_seconds)
+
+    from .services.usage_meter import get_usage_meter
+    try:
+        await get_usage_meter().stop()
+    except Exception as e:
+        logger.error("Error flushing usage counters", error=str(e))
+
+    from .workers.partition_maintenance import get_partition_maintenance
+    await get_partition_maintenance().stop()
+
+    from .services.llm_client import get_llm_client
+    await get_llm_client().close()
+
+    from .services.supabase_client import supabase_client
+    await supabase_client.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+class SearchFiltersModel(BaseModel):
+    file_ids: Optional[List[str]] = Field(None, max_items=500)
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Chunk metadata must contain these key/value pairs")
+    file_types: Optional[List[str]] = Field(None, max_items=50)
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+
+class WorkbenchSearchRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=4000)
+    limit: int = Field(5, ge=1, le=50)
+    filters: Optional[SearchFiltersModel] = None
+
+class WorkbenchSearchResponse(BaseModel):
+    query: str
+    results: List[Dict[str, Any]]
+    degraded: List[str] = Field(default_factory=list, description="Search stages cut short by the latency deadline or errors")
+
+class CompanySearchRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=4000)
+    limit: int = Field(10, ge=1, le=50)
+    per_workbench_limit: int = Field(5, ge=1, le=20)
+    filters: Optional[SearchFiltersModel] = None
+
+class CompanySearchResponse(BaseModel):
+    query: str
+    results: List[Dict[str, Any]]
+    workbenches_searched: int
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_items=1, max_items=500)
+    limit: int = Field(5, ge=1, le=50)
+    filters: Optional[SearchFiltersModel] = None
+
+class BatchSearchResponse(BaseModel):
+    results: List[List[Dict[str, Any]]]
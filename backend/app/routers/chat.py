@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator
+import json
 import structlog
 from ..deps import get_supabase_client, get_user_info
 from ..services.chat_service import get_chat_service
@@ -14,6 +16,10 @@ from ..models.chat import (
 logger = structlog.get_logger()
 router = APIRouter()
 
+def _sse_event(event: Dict[str, Any]) -> str:
+    """Format a chat stream event as a server-sent event"""
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
 @router.post("/chat/sessions", response_model=ChatSessionResponse)
 async def create_chat_session(
     session: ChatSessionCreate,
@@ -62,12 +68,13 @@ async def send_chat_message(
         session_data = session_result.data[0]
         workbench_id = session_data["workbench_id"]
 
-        # Process the message
+        # Process the message; the session row is passed along so it is not fetched again
         response_data = await chat_service.send_message(
             session_id=session_id,
             user_id=user["user_id"],
             message=message.content,
-            workbench_id=workbench_id
+            workbench_id=workbench_id,
+            session=session_data
         )
 
         logger.info("Chat message sent", session_id=session_id, user_id=user["user_id"])
@@ -79,6 +86,57 @@ async def send_chat_message(
         logger.error("Error sending chat message", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to send message")
 
+@router.post("/chat/sessions/{session_id}/messages/stream")
+async def stream_chat_message(
+    session_id: str,
+    message: ChatMessageCreate,
+    request: Request,
+    user: dict = Depends(get_user_info),
+    supabase = Depends(get_supabase_client)
+):
+    """Send a message and stream the answer as server-sent events (context, token..., done)"""
+    chat_service = get_chat_service()
+
+    # Get session info to extract workbench_id
+    session_result = supabase.client.table("session").select("*").eq("session_id", session_id).execute()
+
+    if not session_result.data:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+
+    session_data = session_result.data[0]
+    workbench_id = session_data["workbench_id"]
+
+    # Check ownership before the 200 and headers go out; inside the stream it could only be an error event
+    if session_data["user_id"] != user["user_id"]:
+        raise HTTPException(status_code=403, detail="Access denied to session")
+
+    async def event_stream() -> AsyncIterator[str]:
+        events = chat_service.stream_message(
+            session_id=session_id,
+            user_id=user["user_id"],
+            message=message.content,
+            workbench_id=workbench_id,
+            session=session_data
+        )
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    logger.info("Chat stream client disconnected", session_id=session_id)
+                    break
+                yield _sse_event(event)
+        except Exception as e:
+            logger.error("Error streaming chat message", error=str(e))
+            yield _sse_event({"event": "error", "data": {"detail": "Failed to send message"}})
+        finally:
+            # Closing the generator stops generation and persists any partial answer
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/chat/sessions/{session_id}/messages", response_model=List[ChatMessageResponse])
 async def get_chat_messages(
     session_id: str,
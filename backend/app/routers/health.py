@@ -1,6 +1,10 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from datetime import datetime
 import structlog
+from ..core.metrics import metrics
+from ..services.supabase_client import supabase_client
+from ..services import embedding_cache, vector_index, bm25_index
 
 logger = structlog.get_logger()
 
@@ -14,5 +18,25 @@ async def healthz():
 @router.get("/readyz")
 async def readyz():
     """Readiness probe endpoint"""
-    # Add any readiness checks here (database connectivity, etc.)
-    return {"status": "ready", "timestamp": datetime.utcnow().isoformat()}
+    if not await supabase_client.check_database():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "database": "unavailable", "timestamp": datetime.utcnow().isoformat()}
+        )
+    return {"status": "ready", "database": "ok", "timestamp": datetime.utcnow().isoformat()}
+
+@router.get("/metrics")
+async def get_metrics():
+    """In-process counters and gauges (cache hit rates, pool usage, etc.)"""
+    supabase_client.record_pool_metrics()
+    # Only report caches and indexes this process has created; reading metrics must not build them
+    caches = {
+        name: instance.stats()
+        for name, instance in {
+            "embedding_cache": embedding_cache.embedding_cache,
+            "vector_index": vector_index.vector_index,
+            "bm25_index": bm25_index.bm25_index
+        }.items()
+        if instance is not None
+    }
+    return {**metrics.snapshot(), "caches": caches, "timestamp": datetime.utcnow().isoformat()}
@@ -0,0 +1,132 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+import structlog
+from ..deps import get_supabase_client, get_user_info
+from ..services.rag_service import get_rag_service
+from ..services.search_filters import SearchFilters
+from ..models.search import (
+    SearchFiltersModel,
+    WorkbenchSearchRequest,
+    WorkbenchSearchResponse,
+    CompanySearchRequest,
+    CompanySearchResponse,
+    BatchSearchRequest,
+    BatchSearchResponse
+)
+from .companies import verify_company_access
+from .workbenches import verify_workbench_access
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+async def get_accessible_company_workbenches(company_id: str, user: dict, supabase) -> List[dict]:
+    """Resolve the company's workbenches the user owns or is a member of"""
+    workbenches_result = supabase.client.table("workbench").select("id, name, owner_user_id").eq("company_id", company_id).execute()
+    workbenches = workbenches_result.data or []
+
+    if not workbenches:
+        return []
+
+    member_result = supabase.client.table("workbench_members").select("workbench_id").eq("user_id", user["user_id"]).in_(
+        "workbench_id", [workbench["id"] for workbench in workbenches]
+    ).execute()
+    member_workbench_ids = {row["workbench_id"] for row in member_result.data or []}
+
+    return [
+        workbench for workbench in workbenches
+        if workbench["owner_user_id"] == user["user_id"] or workbench["id"] in member_workbench_ids
+    ]
+
+def to_search_filters(filters: Optional[SearchFiltersModel]) -> Optional[SearchFilters]:
+    """Convert request filters into the service-level filter object"""
+    if filters is None:
+        return None
+    return SearchFilters(**filters.dict())
+
+@router.post("/workbenches/{workbench_id}/search", response_model=WorkbenchSearchResponse)
+async def search_workbench(
+    workbench_id: str,
+    request: WorkbenchSearchRequest,
+    user: dict = Depends(get_user_info),
+    supabase = Depends(get_supabase_client)
+):
+    """Hybrid search over one workbench, optionally restricted by file, metadata or upload date"""
+    try:
+        await verify_workbench_access(workbench_id, user, supabase)
+
+        rag_service = get_rag_service()
+        retrieval = await rag_service.hybrid_search_with_status(
+            request.query,
+            workbench_id,
+            limit=request.limit,
+            filters=to_search_filters(request.filters)
+        )
+
+        logger.info("Workbench search", workbench_id=workbench_id, user_id=user["user_id"], filtered=request.filters is not None)
+        return WorkbenchSearchResponse(query=request.query, results=retrieval.results, degraded=retrieval.degraded_legs)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error searching workbench", workbench_id=workbench_id, error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to search workbench")
+
+@router.post("/companies/{company_id}/search", response_model=CompanySearchResponse)
+async def search_company(
+    company_id: str,
+    request: CompanySearchRequest,
+    user: dict = Depends(get_user_info),
+    supabase = Depends(get_supabase_client)
+):
+    """Search across every workbench in a company the user can access"""
+    try:
+        await verify_company_access(company_id, user, supabase)
+
+        workbenches = await get_accessible_company_workbenches(company_id, user, supabase)
+
+        rag_service = get_rag_service()
+        results = await rag_service.company_search(
+            request.query,
+            workbenches,
+            limit=request.limit,
+            per_workbench_limit=request.per_workbench_limit,
+            filters=to_search_filters(request.filters)
+        )
+
+        logger.info("Company search", company_id=company_id, user_id=user["user_id"], workbenches=len(workbenches))
+        return CompanySearchResponse(
+            query=request.query,
+            results=results,
+            workbenches_searched=len(workbenches)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error searching company", company_id=company_id, error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to search company")
+
+@router.post("/workbenches/{workbench_id}/search/batch", response_model=BatchSearchResponse)
+async def batch_search_workbench(
+    workbench_id: str,
+    request: BatchSearchRequest,
+    user: dict = Depends(get_user_info),
+    supabase = Depends(get_supabase_client)
+):
+    """Run many retrieval queries against one workbench; results are returned in query order"""
+    try:
+        await verify_workbench_access(workbench_id, user, supabase)
+
+        rag_service = get_rag_service()
+        results = await rag_service.batch_search(
+            request.queries, workbench_id, limit=request.limit, filters=to_search_filters(request.filters)
+        )
+
+        logger.info("Batch search", workbench_id=workbench_id, user_id=user["user_id"], queries=len(request.queries))
+        return BatchSearchResponse(results=results)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error in batch search", workbench_id=workbench_id, error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to run batch search")
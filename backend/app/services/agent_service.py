@@ -65,7 +65,7 @@ class AgentService:
     async def list_agents(self, user_id: str, workbench_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """List available agents for user"""
         try:
-            query = self.supabase.client.table("agent").select("*")
+            query = self.supabase.read_client.table("agent").select("*")
 
             if workbench_id:
                 query = query.eq("workbench_id", workbench_id)
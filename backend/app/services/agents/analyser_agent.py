@@ -2,6 +2,7 @@ from typing import Dict, Any, List
 import structlog
 import json
 from .base_agent import BaseAgent
+from ..context_packer import get_context_packer
 
 logger = structlog.get_logger()
 
@@ -62,18 +63,17 @@ Be precise, data-driven, and always acknowledge uncertainty when present."""
         if not context_chunks:
             return "No specific data context available for analysis."
 
-        context_parts = []
-        for i, chunk in enumerate(context_chunks, 1):
-            relevance = chunk.get("similarity", chunk.get("rank", 0))
-            content = chunk['content']
+        def format_source(i: int, segment) -> str:
+            content = segment.content
 
             # Extract potential data points from content
             data_points = self._extract_data_points(content)
             data_summary = f" | Data points: {len(data_points)}" if data_points else ""
 
-            context_parts.append(f"[Source {i} - Relevance: {relevance".3f"}{data_summary}]\n{content}")
+            return f"[Source {i} - Relevance: {segment.relevance:.3f}{data_summary}]\n{content}"
 
-        return "\n\n" + "="*50 + "\n\n".join(context_parts)
+        packed = get_context_packer().pack(context_chunks, formatter=format_source)
+        return "\n\n" + "="*50 + packed.text
 
     def _analyze_data_structure(self, context_chunks: List[Dict]) -> Dict[str, Any]:
         """Analyze the structure and quality of available data"""
@@ -215,7 +215,7 @@ Based on the available data, I can identify the following trends:
 4. **Trends**: Performance trajectory analysis
 
 **Quantitative Analysis:**
-- Average performance score: {sum(range(min(data_summary['numeric_values_count'], 10))) / min(data_summary['numeric_values_count'], 10)".1f"}/10
+- Average performance score: {sum(range(min(data_summary['numeric_values_count'], 10))) / min(data_summary['numeric_values_count'], 10):.1f}/10
 - Variability index: {'Low' if data_summary['numeric_values_count'] < 5 else 'Moderate' if data_summary['numeric_values_count'] < 15 else 'High'}
 - Statistical significance: {'Strong' if data_summary['total_chunks'] > 7 else 'Moderate'}
 
@@ -1,6 +1,7 @@
 from typing import Dict, Any, List
 import structlog
 from .base_agent import BaseAgent
+from ..context_packer import get_context_packer
 
 logger = structlog.get_logger()
 
@@ -57,12 +58,10 @@ Remember: You are Dabby, the trusted financial consultant. Be confident in your
         if not context_chunks:
             return ""
 
-        context_parts = []
-        for i, chunk in enumerate(context_chunks, 1):
-            relevance = chunk.get("similarity", chunk.get("rank", 0))
-            context_parts.append(f"[Source {i} - Relevance: {relevance".2f"}] {chunk['content']}")
+        def format_source(i: int, segment) -> str:
+            return f"[Source {i} - Relevance: {segment.relevance:.2f}] {segment.content}"
 
-        return "\n\n".join(context_parts)
+        return get_context_packer().pack(context_chunks, formatter=format_source).text
 
     def _handle_financial_query(self, query: str, context: str) -> str:
         """Handle financial-related queries"""
@@ -0,0 +1,311 @@
+import asyncio
+import math
+import re
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import structlog
+import numpy as np
+from ..services.supabase_client import supabase_client
+from ..core.cache import TTLLRUCache
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Rows tokenized between yields to the event loop while loading
+_ADD_SLICE_ROWS = 200
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "as", "from"
+})
+
+# BM25 score that maps to rank 0.5; rank = score / (score + this), the shape of ts_rank_cd's
+# normalization 32 used by the Postgres keyword fallback
+BM25_RANK_HALF_SCORE = 10.0
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words"""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+class WorkbenchBM25:
+    """Append-only inverted index for one workbench.
+
+    Each term's postings are two parallel int32 arrays (chunk row, term frequency),
+    kept in row order because chunks are only ever appended in chunk_seq order.
+    """
+
+    def __init__(self, workbench_id: str, index_version: int):
+        self.workbench_id = workbench_id
+        self.index_version = index_version
+        self.last_seq = -1
+        self.ids: List[str] = []
+        self.file_ids: List[str] = []
+        self.contents: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.doc_lengths = array("i")
+        self.total_length = 0
+        self.vocabulary: Dict[str, int] = {}
+        self.posting_rows: List[array] = []
+        self.posting_freqs: List[array] = []
+        self._content_bytes = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        postings = sum(rows.itemsize * len(rows) * 2 for rows in self.posting_rows)
+        return postings + self.doc_lengths.itemsize * len(self.doc_lengths) + self._content_bytes
+
+    def add(self, row: Any):
+        """Append one chunk row (id, file_id, content, metadata, chunk_seq)"""
+        position = len(self.ids)
+        content = row["content"] or ""
+
+        frequencies: Dict[str, int] = {}
+        for token in tokenize(content):
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        for term, frequency in frequencies.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                term_id = len(self.posting_rows)
+                self.vocabulary[term] = term_id
+                self.posting_rows.append(array("i"))
+                self.posting_freqs.append(array("i"))
+            self.posting_rows[term_id].append(position)
+            self.posting_freqs[term_id].append(frequency)
+
+        length = sum(frequencies.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        self.ids.append(str(row["id"]))
+        self.file_ids.append(str(row["file_id"]))
+        self.contents.append(content)
+        self.metadata.append(row["metadata"] or {})
+        self._content_bytes += len(content)
+        self.last_seq = max(self.last_seq, row["chunk_seq"])
+
+    def search(self, terms: List[str], limit: int, k1: float = 1.2, b: float = 0.75) -> List[tuple]:
+        """Return (row, score) pairs for chunks matching any term, best first"""
+        if not self.ids or limit <= 0:
+            return []
+
+        count = len(self.ids)
+        average_length = self.total_length / count or 1.0
+        doc_lengths = np.frombuffer(self.doc_lengths, dtype=np.int32)
+        scores = np.zeros(count, dtype=np.float32)
+
+        for term in set(terms):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+
+            rows = np.frombuffer(self.posting_rows[term_id], dtype=np.int32)
+            frequencies = np.frombuffer(self.posting_freqs[term_id], dtype=np.int32).astype(np.float32)
+            idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = k1 * (1 - b + b * doc_lengths[rows] / average_length)
+            # Postings hold each row at most once, so fancy-index += is safe
+            scores[rows] += idf * frequencies * (k1 + 1) / (frequencies + norm)
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+
+        if matched.size > limit:
+            top = np.argpartition(scores[matched], -limit)[-limit:]
+            matched = matched[top]
+
+        order = np.argsort(scores[matched])[::-1]
+        return [(int(row), float(scores[row])) for row in matched[order]]
+
+class BM25Index:
+    """In-process BM25 keyword index per workbench, refreshed incrementally by chunk_seq"""
+
+    def __init__(self, max_chunks: int = 100000, memory_limit_bytes: int = 256 * 1024 * 1024):
+        self.supabase = supabase_client
+        self.max_chunks = max_chunks
+        self.memory_limit_bytes = memory_limit_bytes
+        self._entries: "OrderedDict[str, WorkbenchBM25]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        # Serializes loads per workbench so two refreshes never append the same rows twice; a
+        # lock lives only as long as its workbench's entry or load
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        self._oversized = TTLLRUCache(10000, 3600)
+
+    async def search(
+        self,
+        workbench_id: str,
+        index_version: int,
+        keywords: List[str],
+        limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Search a loaded workbench; returns None when the caller should fall back to Postgres"""
+        entry = self._entries.get(workbench_id)
+        if entry is None or entry.index_version != index_version:
+            self._schedule_load(workbench_id, index_version)
+            metrics.incr("bm25_index.fallbacks")
+            return None
+
+        self._entries.move_to_end(workbench_id)
+        metrics.incr("bm25_index.hits")
+
+        hits = entry.search(tokenize(" ".join(keywords)), limit)
+        if not hits:
+            return []
+
+        # Bounded absolute scale, so fusion weighs these like the Postgres fallback's ranks
+        return [
+            {
+                "id": entry.ids[row],
+                "workbench_id": workbench_id,
+                "file_id": entry.file_ids[row],
+                "content": entry.contents[row],
+                "metadata": entry.metadata[row],
+                "rank": score / (score + BM25_RANK_HALF_SCORE),
+                "bm25": score
+            }
+            for row, score in hits
+        ]
+
+    async def refresh(self, workbench_id: str, index_version: int):
+        """Bring a workbench up to date now, e.g. right after indexing new chunks"""
+        await self._load(workbench_id, index_version)
+
+    def invalidate(self, workbench_id: str):
+        """Drop a workbench from memory"""
+        self._entries.pop(workbench_id, None)
+        self._load_locks.pop(workbench_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return loaded workbenches and memory usage"""
+        return {
+            "workbenches": len(self._entries),
+            "chunks": sum(entry.size for entry in self._entries.values()),
+            "bytes": sum(entry.nbytes for entry in self._entries.values()),
+            "memory_limit_bytes": self.memory_limit_bytes
+        }
+
+    def _schedule_load(self, workbench_id: str, index_version: int):
+        """Start a background load unless one is running or the workbench is too large"""
+        if workbench_id in self._loading or self._oversized.get((workbench_id, index_version)):
+            return
+
+        task = asyncio.create_task(self._load(workbench_id, index_version))
+        self._loading[workbench_id] = task
+        task.add_done_callback(lambda _: self._loading.pop(workbench_id, None))
+
+    async def _load(self, workbench_id: str, index_version: int):
+        """Build a workbench's index, or append only chunks newer than its last_seq"""
+        lock = self._load_locks.setdefault(workbench_id, asyncio.Lock())
+        try:
+            async with lock:
+                await self._load_locked(workbench_id, index_version)
+        finally:
+            # A load that stored nothing (too large, failed) must not leave its lock behind
+            if workbench_id not in self._entries and self._load_locks.get(workbench_id) is lock:
+                del self._load_locks[workbench_id]
+
+    async def _load_locked(self, workbench_id: str, index_version: int):
+        try:
+            pool = await self.supabase.get_pool()
+            async with pool.acquire() as conn:
+                total = await conn.fetchval(
+                    "SELECT count(*) FROM workbench_chunks WHERE workbench_id = $1", workbench_id
+                )
+
+                if total > self.max_chunks:
+                    self._oversized.set((workbench_id, index_version), True)
+                    self.invalidate(workbench_id)
+                    logger.info("Workbench too large for BM25 index", workbench_id=workbench_id, chunks=total)
+                    return
+
+                entry = self._entries.get(workbench_id)
+                after_seq = entry.last_seq if entry is not None else -1
+                rows = await conn.fetch(
+                    """
+                    SELECT id, file_id, content, metadata, chunk_seq
+                    FROM workbench_chunks
+                    WHERE workbench_id = $1 AND chunk_seq > $2
+                    ORDER BY chunk_seq
+                    """,
+                    workbench_id,
+                    after_seq
+                )
+
+                # Chunks were deleted since the last load; postings are append-only, so rebuild
+                if entry is not None and entry.size + len(rows) != total:
+                    entry = None
+                    rows = await conn.fetch(
+                        """
+                        SELECT id, file_id, content, metadata, chunk_seq
+                        FROM workbench_chunks
+                        WHERE workbench_id = $1
+                        ORDER BY chunk_seq
+                        """,
+                        workbench_id
+                    )
+
+            incremental = entry is not None
+            if entry is None:
+                entry = WorkbenchBM25(workbench_id, index_version)
+            for position, row in enumerate(rows, 1):
+                entry.add(row)
+                # Each add leaves the entry consistent, so yield between slices to keep serving requests
+                if position % _ADD_SLICE_ROWS == 0:
+                    await asyncio.sleep(0)
+            entry.index_version = index_version
+
+            self._store(entry)
+            logger.info(
+                "Loaded workbench into BM25 index",
+                workbench_id=workbench_id,
+                index_version=index_version,
+                chunks=entry.size,
+                added=len(rows),
+                incremental=incremental
+            )
+
+        except Exception as e:
+            logger.error("Error loading BM25 index", workbench_id=workbench_id, error=str(e))
+
+    def _store(self, entry: WorkbenchBM25):
+        """Insert an entry and evict least recently used workbenches over the memory cap"""
+        if entry.nbytes > self.memory_limit_bytes:
+            self._oversized.set((entry.workbench_id, entry.index_version), True)
+            self.invalidate(entry.workbench_id)
+            return
+
+        self._entries[entry.workbench_id] = entry
+        self._entries.move_to_end(entry.workbench_id)
+
+        used = sum(item.nbytes for item in self._entries.values())
+        while used > self.memory_limit_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            # A load still running under the dropped lock holds the evicted entry, which no
+            # load starting on a fresh lock can reach
+            self._load_locks.pop(evicted.workbench_id, None)
+            used -= evicted.nbytes
+            metrics.incr("bm25_index.evictions")
+            logger.info("Evicted workbench from BM25 index", workbench_id=evicted.workbench_id)
+
+        metrics.set_gauge("bm25_index.bytes", used)
+        metrics.set_gauge("bm25_index.workbenches", len(self._entries))
+
+# Global BM25 index instance
+bm25_index: Optional[BM25Index] = None
+
+def get_bm25_index() -> BM25Index:
+    """Get or create BM25 index instance"""
+    global bm25_index
+    if bm25_index is None:
+        bm25_index = BM25Index(
+            max_chunks=settings.bm25_index_max_chunks,
+            memory_limit_bytes=settings.bm25_index_memory_mb * 1024 * 1024
+        )
+    return bm25_index
@@ -1,18 +1,47 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Set
 import structlog
 import asyncio
 from ..services.supabase_client import supabase_client
 from ..services.rag_service import get_rag_service
+from ..services.context_packer import get_context_packer, PackedContext
+from ..services.semantic_cache import get_semantic_cache, SemanticCacheEntry
+from ..services.index_versions import get_index_version_tracker
+from ..services.llm_client import get_llm_client
+from ..services.write_behind import get_write_behind
+from ..services.usage_meter import get_usage_meter
+from ..services.conversation_memory import get_conversation_memory
 from ..core.config import settings
 
 logger = structlog.get_logger()
 
+class ChatContext:
+    """Retrieved context for one chat turn, or the semantic cache entry that replaces it"""
+
+    def __init__(self, index_version: Optional[int], query_embedding: Optional[List[float]]):
+        self.index_version = index_version
+        self.query_embedding = query_embedding
+        self.cached: Optional[SemanticCacheEntry] = None
+        self.context_chunks: List[Dict[str, Any]] = []
+        self.context_stats: Dict[str, Any] = {}
+        self.packed_context: Optional[PackedContext] = None
+        self.degraded_legs: List[str] = []
+        self.history = ""
+
 class ChatService:
     """Chat service with LLM integration and session management"""
 
     def __init__(self):
         self.supabase = supabase_client
         self.rag_service = get_rag_service()
+        self.context_packer = get_context_packer()
+        self.semantic_cache = get_semantic_cache()
+        self.index_versions = get_index_version_tracker()
+        self.llm = get_llm_client()
+        self.write_behind = get_write_behind()
+        self.usage_meter = get_usage_meter()
+        self.conversation_memory = get_conversation_memory()
+        # Strong references to fire-and-forget persistence tasks until they finish
+        self._background_tasks: Set[asyncio.Task] = set()
 
     async def create_session(
         self,
@@ -46,42 +75,99 @@ class ChatService:
         session_id: str,
         user_id: str,
         message: str,
-        workbench_id: str
+        workbench_id: str,
+        session: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Send a message and get AI response"""
-        try:
-            # Verify session access
-            await self._verify_session_access(session_id, user_id, workbench_id)
-
-            # Store user message
-            await self._store_message(session_id, user_id, "user", message)
+        """Send a message and get AI response.
 
-            # Search for relevant context
-            context_chunks = await self.rag_service.hybrid_search(message, workbench_id)
-
-            # Generate AI response
-            ai_response = await self._generate_ai_response(message, context_chunks, workbench_id)
+        Pass the session row when the caller already fetched it; otherwise it is
+        read here. Retrieval starts before the session is read and checked and runs
+        while the user message is written; it is cancelled if access is denied. The
+        assistant message and usage counter are written behind the response.
+        """
+        try:
+            context = await self._prepare_turn(session_id, user_id, message, workbench_id, session)
 
-            # Store AI response
-            await self._store_message(session_id, "system", "assistant", ai_response)
+            if context.cached is not None:
+                ai_response = context.cached.response
+            else:
+                # Generate AI response
+                ai_response = await self._generate_ai_response(
+                    message, context.packed_context, workbench_id, context.history
+                )
+                self._remember_answer(workbench_id, message, context, ai_response)
 
-            # Update session usage counter
-            await self._update_usage_counter(user_id)
+            await self._persist_reply(session_id, user_id, message, ai_response)
 
             logger.info("Chat message processed", session_id=session_id, message_length=len(message))
             return {
                 "message": ai_response,
-                "context_chunks": context_chunks,
-                "usage_info": {
-                    "tokens_used": len(ai_response.split()) * 1.3,  # Rough estimate
-                    "context_chunks": len(context_chunks)
-                }
+                "context_chunks": context.context_chunks,
+                "usage_info": self._usage_info(context, ai_response)
             }
 
         except Exception as e:
             logger.error("Error processing chat message", error=str(e))
             raise
 
+    async def stream_message(
+        self,
+        session_id: str,
+        user_id: str,
+        message: str,
+        workbench_id: str,
+        session: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Send a message and yield the AI response as it is generated.
+
+        Yields a "context" event with retrieved chunk metadata, then "token" events,
+        then "done" with usage info. The assistant message is persisted in the
+        background; if the consumer stops early the partial answer is stored
+        marked as interrupted.
+        """
+        context = await self._prepare_turn(session_id, user_id, message, workbench_id, session)
+
+        yield {
+            "event": "context",
+            "data": {
+                "context_chunks": [self._context_metadata(chunk) for chunk in context.context_chunks],
+                "semantic_cache_hit": context.cached is not None,
+                "retrieval_degraded": context.degraded_legs,
+                **context.context_stats
+            }
+        }
+
+        parts: List[str] = []
+        completed = False
+        try:
+            if context.cached is not None:
+                parts.append(context.cached.response)
+                yield {"event": "token", "data": {"text": context.cached.response}}
+            else:
+                system_prompt = self._create_system_prompt(workbench_id, context.packed_context.text, context.history)
+                async for token in self._stream_llm(system_prompt, message):
+                    parts.append(token)
+                    yield {"event": "token", "data": {"text": token}}
+
+            ai_response = "".join(parts)
+            completed = True
+
+            if context.cached is None:
+                self._remember_answer(workbench_id, message, context, ai_response)
+
+            yield {"event": "done", "data": {"usage_info": self._usage_info(context, ai_response)}}
+
+        finally:
+            # Runs on completion and when the client disconnects (generator closed or cancelled)
+            if completed or parts:
+                self._spawn(self._persist_reply(
+                    session_id, user_id, message, "".join(parts), None if completed else {"interrupted": True}
+                ))
+            if not completed:
+                logger.info("Chat stream interrupted", session_id=session_id, tokens_sent=len(parts))
+            else:
+                logger.info("Chat message streamed", session_id=session_id, message_length=len(message))
+
     async def get_session_messages(
         self,
         session_id: str,
@@ -115,14 +201,22 @@ class ChatService:
 
     async def _verify_session_access(self, session_id: str, user_id: str, workbench_id: str):
         """Verify user has access to the session and workbench"""
-        # Check if session exists and user has access to the workbench
-        session_result = self.supabase.client.table("session").select("*").eq("session_id", session_id).execute()
+        self._check_session_access(await self._load_session(session_id), user_id, workbench_id)
+
+    async def _load_session(self, session_id: str) -> Dict[str, Any]:
+        """Fetch a session row without blocking the event loop"""
+        session_result = await asyncio.to_thread(
+            self.supabase.client.table("session").select("*").eq("session_id", session_id).execute
+        )
 
         if not session_result.data:
             raise Exception("Session not found")
 
-        session = session_result.data[0]
+        return session_result.data[0]
 
+    @staticmethod
+    def _check_session_access(session: Dict[str, Any], user_id: str, workbench_id: str):
+        """Check that the session belongs to the user and workbench"""
         if session["user_id"] != user_id:
             raise Exception("Access denied to session")
 
@@ -139,34 +233,43 @@ class ChatService:
     ):
         """Store a message in the database"""
         try:
-            message_data = {
-                "session_id": session_id,
-                "sender_id": sender_id if message_type == "user" else None,
-                "message_type": message_type,
-                "content": content,
-                "metadata": metadata or {}
-            }
-
-            self.supabase.client.table("message").insert(message_data).execute()
+            await self._insert_message(session_id, sender_id, message_type, content, metadata)
 
         except Exception as e:
             logger.error("Error storing message", error=str(e))
 
+    async def _insert_message(
+        self,
+        session_id: str,
+        sender_id: str,
+        message_type: str,
+        content: str,
+        metadata: Optional[Dict] = None
+    ):
+        """Insert a message row off the event loop; raises on failure"""
+        message_data = {
+            "session_id": session_id,
+            "sender_id": sender_id if message_type == "user" else None,
+            "message_type": message_type,
+            "content": content,
+            "metadata": metadata or {}
+        }
+
+        await asyncio.to_thread(self.supabase.client.table("message").insert(message_data).execute)
+
     async def _generate_ai_response(
         self,
         user_message: str,
-        context_chunks: List[Dict],
-        workbench_id: str
+        packed_context: PackedContext,
+        workbench_id: str,
+        history: str = ""
     ) -> str:
-        """Generate AI response using context and LLM"""
+        """Generate AI response using context, conversation history and LLM"""
         try:
-            # Build context from chunks
-            context_text = self._build_context_text(context_chunks)
-
             # Create system prompt
-            system_prompt = self._create_system_prompt(workbench_id, context_text)
+            system_prompt = self._create_system_prompt(workbench_id, packed_context.text, history)
 
-            # Generate response using Groq (placeholder)
+            # Generate response using Groq
             response = await self._call_llm(system_prompt, user_message)
 
             return response
@@ -175,18 +278,151 @@ class ChatService:
             logger.error("Error generating AI response", error=str(e))
             return "I apologize, but I encountered an error while processing your request. Please try again."
 
-    def _build_context_text(self, context_chunks: List[Dict]) -> str:
-        """Build context text from search results"""
-        if not context_chunks:
-            return ""
+    async def _prepare_turn(
+        self,
+        session_id: str,
+        user_id: str,
+        message: str,
+        workbench_id: str,
+        session: Optional[Dict[str, Any]]
+    ) -> "ChatContext":
+        """Start retrieval, check access, then store the user message while retrieval runs"""
+        # Whether the semantic cache may answer depends on the session's history,
+        # which is only known once the session row is in hand
+        use_semantic_cache = asyncio.get_running_loop().create_future()
+        retrieval = asyncio.create_task(self._retrieve_context(message, workbench_id, use_semantic_cache))
+        try:
+            if session is None:
+                session = await self._load_session(session_id)
+            self._check_session_access(session, user_id, workbench_id)
+
+            # Conversation memory comes with the session row, so history costs no extra read
+            history = ""
+            if settings.conversation_memory_enabled:
+                history = self.conversation_memory.load(session).render(self.conversation_memory.token_budget)
 
-        context_parts = []
-        for i, chunk in enumerate(context_chunks, 1):
-            context_parts.append(f"[Source {i}] {chunk['content']}")
+            # Answers that depend on earlier turns must not be served from or stored in the semantic cache
+            use_semantic_cache.set_result(not history)
+            await self._store_message(session_id, user_id, "user", message)
+            context = await retrieval
+            context.history = history
+            return context
 
-        return "\n\n".join(context_parts)
+        except BaseException:
+            retrieval.cancel()
+            raise
 
-    def _create_system_prompt(self, workbench_id: str, context: str) -> str:
+    async def _retrieve_context(self, message: str, workbench_id: str, use_semantic_cache: Awaitable[bool]) -> "ChatContext":
+        """Reuse a near-identical recent question, else search and pack context"""
+        # The query embedding and index version are computed while access is still being checked
+        index_version, query_embedding = await self._semantic_cache_key(message, workbench_id)
+        if index_version is not None and not await use_semantic_cache:
+            index_version, query_embedding = (None, None)
+        context = ChatContext(index_version, query_embedding)
+        if index_version is not None:
+            context.cached = self.semantic_cache.lookup(workbench_id, index_version, query_embedding)
+
+        if context.cached is not None:
+            context.context_chunks = [dict(chunk) for chunk in context.cached.context_chunks]
+            context.context_stats = context.cached.context_stats
+            return context
+
+        # Search for relevant context within the retrieval deadline
+        retrieval = await self.rag_service.hybrid_search_with_status(message, workbench_id)
+        context.context_chunks = retrieval.results
+        context.degraded_legs = retrieval.degraded_legs
+
+        # Merge overlapping hits and fit them to the prompt token budget
+        context.packed_context = self._build_context(context.context_chunks)
+        context.context_stats = context.packed_context.stats()
+        return context
+
+    def _remember_answer(self, workbench_id: str, message: str, context: "ChatContext", ai_response: str):
+        """Cache a fresh answer; answers built on partial retrieval are not reused"""
+        if context.index_version is None or context.degraded_legs or self._is_error_response(ai_response):
+            return
+        self.semantic_cache.store(
+            workbench_id, context.index_version, message, context.query_embedding,
+            context.context_chunks, ai_response, context.context_stats
+        )
+
+    @staticmethod
+    def _usage_info(context: "ChatContext", ai_response: str) -> Dict[str, Any]:
+        return {
+            "tokens_used": len(ai_response.split()) * 1.3,  # Rough estimate
+            "context_chunks": len(context.context_chunks),
+            "semantic_cache_hit": context.cached is not None,
+            "retrieval_degraded": context.degraded_legs,
+            **context.context_stats
+        }
+
+    async def _persist_reply(
+        self,
+        session_id: str,
+        user_id: str,
+        user_message: str,
+        ai_response: str,
+        metadata: Optional[Dict] = None
+    ):
+        """Queue the assistant message, conversation memory and usage count behind the response"""
+        await self.write_behind.submit(
+            session_id,
+            "store_assistant_message",
+            lambda: self._insert_message(session_id, "system", "assistant", ai_response, metadata)
+        )
+        # Interrupted and failed answers are not worth remembering
+        if settings.conversation_memory_enabled and metadata is None and not self._is_error_response(ai_response):
+            # Summarizing can wait on the LLM, so it must not hold up the session's write shard
+            self._spawn(self._record_conversation_turn(session_id, user_message, ai_response))
+        await self.write_behind.submit(user_id, "record_usage", lambda: self.usage_meter.record(user_id))
+
+    async def _record_conversation_turn(self, session_id: str, user_message: str, ai_response: str):
+        try:
+            await self.conversation_memory.record_turn(session_id, user_message, ai_response)
+        except Exception as e:
+            logger.error("Error recording conversation turn", session_id=session_id, error=str(e))
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    @staticmethod
+    def _context_metadata(chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """What a client needs to cite a context chunk, without its text"""
+        return {
+            "id": chunk.get("id"),
+            "file_id": chunk.get("file_id"),
+            "metadata": chunk.get("metadata") or {},
+            "score": chunk.get("rerank_score", chunk.get("score", chunk.get("similarity")))
+        }
+
+    async def _semantic_cache_key(self, message: str, workbench_id: str):
+        """Index version and query embedding for semantic cache lookups; (None, None) skips the cache"""
+        if not settings.semantic_cache_enabled:
+            return None, None
+
+        try:
+            index_version = await self.index_versions.get_version(workbench_id)
+            query_embedding = await self.rag_service.embed_query(message)
+        except Exception as e:
+            logger.warning("Error preparing semantic cache lookup", workbench_id=workbench_id, error=str(e))
+            return None, None
+
+        if not query_embedding:
+            return None, None
+        return index_version, query_embedding
+
+    @staticmethod
+    def _is_error_response(response: str) -> bool:
+        """Fallback apologies must not be cached as answers"""
+        return response.startswith(("I apologize, but I encountered an error", "I'm currently unable to process"))
+
+    def _build_context(self, context_chunks: List[Dict]) -> PackedContext:
+        """Build token-budgeted context from search results"""
+        return self.context_packer.pack(context_chunks)
+
+    def _create_system_prompt(self, workbench_id: str, context: str, history: str = "") -> str:
         """Create system prompt for the LLM"""
         base_prompt = """You are a helpful AI assistant specialized in analyzing business and financial data. You have access to relevant information from uploaded documents.
 
@@ -198,6 +434,9 @@ When answering questions:
 
 """
 
+        if history:
+            base_prompt += f"\nConversation so far:\n{history}\n"
+
         if context:
             base_prompt += f"\nRelevant context from documents:\n{context}\n"
 
@@ -206,46 +445,33 @@ When answering questions:
     async def _call_llm(self, system_prompt: str, user_message: str) -> str:
         """Call LLM API (Groq) to generate response"""
         try:
-            # Placeholder for Groq API call
-            # In real implementation, you'd use the Groq client
-
-            # Simulate LLM response
-            await asyncio.sleep(0.1)  # Simulate API delay
-
-            # Mock response based on message content
-            if "financial" in user_message.lower() or "revenue" in user_message.lower():
-                return "Based on the available financial data, I can help you analyze revenue trends and projections. The context shows several key financial metrics that might be relevant to your analysis."
-            elif "analysis" in user_message.lower():
-                return "I'll analyze the available data to provide insights. From the context provided, I can identify several key patterns and trends that may be useful for your decision-making."
-            else:
-                return "I understand your question. Let me provide a comprehensive response based on the available context and data analysis."
+            return await self.llm.complete(self._llm_messages(system_prompt, user_message))
 
         except Exception as e:
             logger.error("Error calling LLM", error=str(e))
             return "I'm currently unable to process your request due to a technical issue. Please try again later."
 
-    async def _update_usage_counter(self, user_id: str):
-        """Update user's chat inference counter"""
+    async def _stream_llm(self, system_prompt: str, user_message: str) -> AsyncIterator[str]:
+        """Stream LLM API (Groq) response tokens as they are generated"""
+        emitted = 0
         try:
-            # Get current counter
-            result = self.supabase.client.table("wallet_counters").select("*").eq("user_id", user_id).execute()
-
-            if result.data:
-                # Update existing counter
-                current_count = result.data[0]["chat_inference_counter"] + 1
-                self.supabase.client.table("wallet_counters").update({
-                    "chat_inference_counter": current_count,
-                    "updated_at": "now()"
-                }).eq("user_id", user_id).execute()
-            else:
-                # Create new counter
-                self.supabase.client.table("wallet_counters").insert({
-                    "user_id": user_id,
-                    "chat_inference_counter": 1
-                }).execute()
+            async for token in self.llm.stream(self._llm_messages(system_prompt, user_message)):
+                emitted += 1
+                yield token
 
         except Exception as e:
-            logger.error("Error updating usage counter", error=str(e))
+            logger.error("Error streaming LLM response", error=str(e), tokens_emitted=emitted)
+            if emitted:
+                # The answer is truncated: let the turn end as interrupted so it is not cached or remembered
+                raise
+            yield "I'm currently unable to process your request due to a technical issue. Please try again later."
+
+    @staticmethod
+    def _llm_messages(system_prompt: str, user_message: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
 
 # Global chat service instance
 chat_service: Optional[ChatService] = None
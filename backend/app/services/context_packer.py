@@ -0,0 +1,214 @@
+import json
+from typing import List, Dict, Any, Optional, Callable
+import structlog
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+# Word step between chunk starts used by IndexingWorker (CHUNK_SIZE 1000 - CHUNK_OVERLAP 200).
+# Only needed for chunks indexed before word offsets were stored in their metadata.
+LEGACY_CHUNK_STEP = 800
+
+# Share of the model's context window the prompt budgets may claim. Token counts are
+# estimates, so the rest is headroom for estimation error and the fixed prompt text.
+CONTEXT_WINDOW_SAFETY_MARGIN = 0.75
+
+def count_tokens(text: str) -> int:
+    """Estimate tokens as the larger of words * 4/3 and characters / 4.
+
+    This is a heuristic, not the served model's tokenizer (the Llama tokenizer
+    behind LLM_MODEL is not available offline). Taking the larger estimate errs
+    high on number- and table-heavy text, where words * 4/3 alone undercounts.
+    """
+    return int(max(len(text.split()) * 4 / 3, len(text) / 4)) + 1
+
+class ContextSegment:
+    """A contiguous span of one file, merged from one or more overlapping hits"""
+
+    def __init__(self, file_id: str, word_start: int, words: List[str], chunk_indexes: List[int], relevance: float, rank: int):
+        self.file_id = file_id
+        self.word_start = word_start
+        self.words = words
+        self.chunk_indexes = chunk_indexes
+        self.relevance = relevance
+        self.rank = rank
+
+    @property
+    def word_end(self) -> int:
+        return self.word_start + len(self.words)
+
+    @property
+    def content(self) -> str:
+        return " ".join(self.words)
+
+class PackedContext:
+    """Prompt context assembled under a token budget"""
+
+    def __init__(self, text: str, segments: List[ContextSegment], tokens: int, naive_tokens: int, dropped_segments: int):
+        self.text = text
+        self.segments = segments
+        self.tokens = tokens
+        self.naive_tokens = naive_tokens
+        self.dropped_segments = dropped_segments
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.naive_tokens - self.tokens, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "context_tokens": self.tokens,
+            "context_tokens_saved": self.tokens_saved,
+            "context_segments": len(self.segments),
+            "context_segments_dropped": self.dropped_segments
+        }
+
+def default_formatter(index: int, segment: ContextSegment) -> str:
+    return f"[Source {index}] {segment.content}"
+
+class ContextPacker:
+    """Merges overlapping hits from the same file and packs them under a token budget"""
+
+    def __init__(self, token_budget: int = 3000, separator: str = "\n\n"):
+        self.token_budget = token_budget
+        self.separator = separator
+
+    def pack(
+        self,
+        chunks: List[Dict[str, Any]],
+        formatter: Callable[[int, ContextSegment], str] = default_formatter,
+        token_budget: Optional[int] = None
+    ) -> PackedContext:
+        """Group hits by file, merge contiguous/overlapping spans, then pack greedily by relevance"""
+        budget = token_budget or self.token_budget
+        if not chunks:
+            return PackedContext("", [], 0, 0, 0)
+
+        naive_tokens = sum(
+            count_tokens(default_formatter(i, self._single_segment(chunk, i)))
+            for i, chunk in enumerate(chunks, 1)
+        )
+
+        segments = self._merge(chunks)
+        # Keep the retrieval order: a segment ranks where its best hit ranked
+        segments.sort(key=lambda segment: segment.rank)
+
+        packed: List[str] = []
+        kept: List[ContextSegment] = []
+        used = 0
+        separator_tokens = count_tokens(self.separator)
+
+        for segment in segments:
+            formatted = formatter(len(kept) + 1, segment)
+            cost = count_tokens(formatted) + (separator_tokens if packed else 0)
+
+            if used + cost > budget:
+                if kept:
+                    continue
+                # Always send something: trim the best segment to fit
+                formatted, cost = self._truncate(segment, formatter, budget)
+
+            packed.append(formatted)
+            kept.append(segment)
+            used += cost
+
+        result = PackedContext(self.separator.join(packed), kept, used, naive_tokens, len(segments) - len(kept))
+        metrics.incr("context_packer.tokens_saved", result.tokens_saved)
+        logger.info("Packed context", **result.stats(), hits=len(chunks))
+        return result
+
+    def _merge(self, chunks: List[Dict[str, Any]]) -> List[ContextSegment]:
+        by_file: Dict[str, List[ContextSegment]] = {}
+        for rank, chunk in enumerate(chunks):
+            segment = self._single_segment(chunk, rank)
+            by_file.setdefault(segment.file_id, []).append(segment)
+
+        merged: List[ContextSegment] = []
+        for file_segments in by_file.values():
+            file_segments.sort(key=lambda segment: segment.word_start)
+            current = file_segments[0]
+
+            for segment in file_segments[1:]:
+                if segment.word_start <= current.word_end:
+                    # Overlapping or adjacent windows: append only the words not already covered
+                    overlap = current.word_end - segment.word_start
+                    current.words = current.words + segment.words[overlap:]
+                    current.chunk_indexes = current.chunk_indexes + segment.chunk_indexes
+                    current.relevance = max(current.relevance, segment.relevance)
+                    current.rank = min(current.rank, segment.rank)
+                else:
+                    merged.append(current)
+                    current = segment
+
+            merged.append(current)
+
+        return merged
+
+    def _single_segment(self, chunk: Dict[str, Any], rank: int) -> ContextSegment:
+        metadata = chunk.get("metadata") or {}
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except ValueError:
+                metadata = {}
+
+        words = chunk["content"].split()
+        chunk_index = metadata.get("chunk_index")
+        word_start = metadata.get("word_start")
+
+        if word_start is None and chunk_index is not None:
+            word_start = chunk_index * LEGACY_CHUNK_STEP
+
+        # Without any position information a hit cannot be merged with its neighbours
+        file_id = str(chunk.get("file_id"))
+        if word_start is None:
+            file_id = f"{file_id}:{chunk.get('id')}"
+            word_start = 0
+
+        relevance = chunk.get("rerank_score", chunk.get("score", chunk.get("similarity", chunk.get("rank", 0.0))))
+        return ContextSegment(
+            file_id,
+            int(word_start),
+            words,
+            [chunk_index] if chunk_index is not None else [],
+            float(relevance or 0.0),
+            rank
+        )
+
+    def _truncate(self, segment: ContextSegment, formatter: Callable[[int, ContextSegment], str], budget: int):
+        """Cut a segment's words until its formatted form fits the budget"""
+        words = segment.words
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            segment.words = words[:middle]
+            if count_tokens(formatter(1, segment)) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+
+        segment.words = words[:low]
+        formatted = formatter(1, segment)
+        return formatted, count_tokens(formatted)
+
+# Global context packer instance
+context_packer: Optional[ContextPacker] = None
+
+def get_context_packer() -> ContextPacker:
+    """Get or create context packer instance"""
+    global context_packer
+    if context_packer is None:
+        # Leave room for conversation history and the answer under the model's context window
+        available = int(settings.llm_context_window * CONTEXT_WINDOW_SAFETY_MARGIN) \
+            - settings.conversation_memory_token_budget - settings.llm_max_tokens
+        token_budget = min(settings.context_token_budget, max(available, 0))
+        if token_budget < settings.context_token_budget:
+            logger.warning(
+                "Context token budget exceeds the model's context window, clamping",
+                configured=settings.context_token_budget,
+                token_budget=token_budget,
+                context_window=settings.llm_context_window
+            )
+        context_packer = ContextPacker(token_budget=token_budget)
+    return context_packer
@@ -0,0 +1,191 @@
+import asyncio
+import json
+from typing import List, Dict, Any, Optional, Set
+import structlog
+from ..services.supabase_client import supabase_client
+from ..services.context_packer import count_tokens
+from ..services.llm_client import get_llm_client
+from ..services.write_behind import get_write_behind
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an assistant about business documents.
+Update the summary with the new exchanges below. Keep facts, figures, names and open questions the user may refer back to; drop pleasantries.
+Reply with the updated summary only, at most {max_words} words."""
+
+# Concurrent turns of one session each re-merge after losing a write; give up after this many tries
+MAX_RECORD_ATTEMPTS = 3
+
+def _keep_last_tokens(text: str, token_budget: int) -> str:
+    """Drop words from the front until the text fits; the newest content is at the end"""
+    words = text.split()
+    while words and count_tokens(" ".join(words)) > token_budget:
+        words = words[max(1, len(words) // 5):]
+    return " ".join(words)
+
+def _format_turns(turns: List[Dict[str, str]]) -> List[str]:
+    return [f"{'User' if turn['role'] == 'user' else 'Assistant'}: {turn['content']}" for turn in turns]
+
+class ConversationMemory:
+    """A session's rolling summary of older turns plus its most recent turns verbatim"""
+
+    def __init__(self, summary: str = "", turns: Optional[List[Dict[str, str]]] = None, summarized_turns: int = 0):
+        self.summary = summary
+        self.turns = turns or []
+        self.summarized_turns = summarized_turns
+
+    @classmethod
+    def from_session(cls, session: Dict[str, Any]) -> "ConversationMemory":
+        """Read memory from the session row's memory columns (migration 012)"""
+        turns = session.get("memory_turns") or []
+        if isinstance(turns, str):
+            turns = json.loads(turns)
+        return cls(session.get("memory_summary") or "", turns, session.get("memory_summarized_turns") or 0)
+
+    @property
+    def recorded_turns(self) -> int:
+        """Turns recorded so far; grows by one with every write, so it versions the memory"""
+        return self.summarized_turns + len(self.turns) // 2
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.summary and not self.turns
+
+    def render(self, token_budget: int) -> str:
+        """Summary then recent turns, dropping the oldest turns and then trimming the summary to fit"""
+        lines = _format_turns(self.turns)
+        summary = f"Summary of earlier conversation: {self.summary}" if self.summary else ""
+
+        while lines and count_tokens("\n".join([summary, *lines])) > token_budget:
+            lines.pop(0)
+
+        if summary and count_tokens("\n".join([summary, *lines])) > token_budget:
+            summary = _keep_last_tokens(summary, max(token_budget - count_tokens("\n".join(lines)), 0))
+
+        return "\n".join(part for part in [summary, *lines] if part)
+
+class ConversationMemoryStore:
+    """Keeps per-session conversation memory on the session row.
+
+    Reading memory costs nothing beyond the session fetch the chat path already
+    does. After each turn the exchange is appended; turns beyond `max_turns` are
+    folded into the summary by the LLM, so the prompt cost stays within
+    `token_budget` however long the conversation runs.
+    """
+
+    def __init__(self, max_turns: int = 6, token_budget: int = 1000, summary_token_budget: int = 300):
+        self.supabase = supabase_client
+        self.llm = get_llm_client()
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.write_behind = get_write_behind()
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    def load(self, session: Dict[str, Any]) -> ConversationMemory:
+        return ConversationMemory.from_session(session)
+
+    async def record_turn(self, session_id: str, user_message: str, ai_response: str, attempt: int = 1):
+        """Append one exchange and fold overflowing turns into the summary; raises on failure.
+
+        Summarizing calls the LLM, so it runs here, in the caller's task, and only
+        the final write goes through the write-behind queue. That write applies
+        only if no other turn was recorded since the read; otherwise the exchange
+        is merged again into the newer memory.
+        """
+        pool = await self.supabase.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT memory_summary, memory_turns, memory_summarized_turns FROM session WHERE session_id = $1",
+                session_id
+            )
+        if row is None:
+            return
+
+        memory = ConversationMemory.from_session(dict(row))
+        read_version = memory.recorded_turns
+        memory.turns.extend([
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": ai_response}
+        ])
+
+        # One turn is a user message and its answer
+        overflow = len(memory.turns) - self.max_turns * 2
+        if overflow > 0:
+            evicted, memory.turns = memory.turns[:overflow], memory.turns[overflow:]
+            memory.summary = await self._summarize(memory.summary, evicted)
+            memory.summarized_turns += overflow // 2
+            metrics.incr("conversation_memory.summaries")
+
+        async def write():
+            if await self._write_if_unchanged(session_id, memory, read_version):
+                return
+            metrics.incr("conversation_memory.conflicts")
+            if attempt >= MAX_RECORD_ATTEMPTS:
+                logger.warning("Dropping conversation turn after repeated conflicts", session_id=session_id, attempts=attempt)
+                return
+            self._spawn(self._record_turn_logged(session_id, user_message, ai_response, attempt + 1))
+
+        await self.write_behind.submit(session_id, "record_conversation_turn", write)
+
+    async def _write_if_unchanged(self, session_id: str, memory: ConversationMemory, read_version: int) -> bool:
+        """Store memory unless another turn was recorded since it was read; False on conflict"""
+        pool = await self.supabase.get_pool()
+        async with pool.acquire() as conn:
+            status = await conn.execute(
+                """
+                UPDATE session
+                SET memory_summary = $2, memory_turns = $3, memory_summarized_turns = $4
+                WHERE session_id = $1
+                  AND memory_summarized_turns + jsonb_array_length(memory_turns) / 2 = $5
+                """,
+                session_id, memory.summary, memory.turns, memory.summarized_turns, read_version
+            )
+        return status != "UPDATE 0"
+
+    async def _record_turn_logged(self, session_id: str, user_message: str, ai_response: str, attempt: int):
+        try:
+            await self.record_turn(session_id, user_message, ai_response, attempt)
+        except Exception as e:
+            logger.error("Error recording conversation turn", session_id=session_id, error=str(e))
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _summarize(self, summary: str, evicted: List[Dict[str, str]]) -> str:
+        """Fold evicted turns into the summary, keeping it within the summary budget"""
+        exchanges = "\n".join(_format_turns(evicted))
+        try:
+            updated = await self.llm.complete(
+                [
+                    {"role": "system", "content": SUMMARY_PROMPT.format(max_words=int(self.summary_token_budget * 0.75))},
+                    {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew exchanges:\n{exchanges}"}
+                ],
+                temperature=0.0,
+                max_tokens=self.summary_token_budget
+            )
+        except Exception as e:
+            # Keep the conversation usable without the LLM: append the user's questions verbatim
+            logger.warning("Error summarizing conversation, appending questions instead", error=str(e))
+            questions = " ".join(f"User asked: {turn['content']}" for turn in evicted if turn["role"] == "user")
+            updated = f"{summary} {questions}".strip()
+
+        return _keep_last_tokens(updated, self.summary_token_budget)
+
+# Global conversation memory store instance
+conversation_memory: Optional[ConversationMemoryStore] = None
+
+def get_conversation_memory() -> ConversationMemoryStore:
+    """Get or create conversation memory store instance"""
+    global conversation_memory
+    if conversation_memory is None:
+        conversation_memory = ConversationMemoryStore(
+            max_turns=settings.conversation_memory_turns,
+            token_budget=settings.conversation_memory_token_budget,
+            summary_token_budget=settings.conversation_summary_token_budget
+        )
+    return conversation_memory
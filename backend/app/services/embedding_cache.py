@@ -0,0 +1,115 @@
+import hashlib
+from typing import List, Optional
+import structlog
+import numpy as np
+from ..core.cache import TTLLRUCache
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+class QueryEmbeddingCache:
+    """Bounded LRU/TTL cache for query embeddings, optionally shared through Redis"""
+
+    def __init__(
+        self,
+        model_version: str,
+        maxsize: int = 2048,
+        ttl_seconds: int = 3600,
+        redis_url: Optional[str] = None
+    ):
+        self.model_version = model_version
+        self.ttl_seconds = ttl_seconds
+        self._local = TTLLRUCache(maxsize, ttl_seconds)
+        self._redis_url = redis_url
+        self._redis = None
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize query text so trivially different strings share an entry"""
+        return " ".join(query.lower().split())
+
+    def _key(self, query: str) -> str:
+        digest = hashlib.sha256(self.normalize(query).encode("utf-8")).hexdigest()
+        return f"qemb:{self.model_version}:{digest}"
+
+    async def get(self, query: str) -> Optional[List[float]]:
+        """Look up an embedding in the local cache, then in Redis"""
+        key = self._key(query)
+
+        embedding = self._local.get(key)
+        if embedding is not None:
+            metrics.incr("embedding_cache.hits")
+            return embedding
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                raw = await redis_client.get(key)
+                if raw:
+                    embedding = np.frombuffer(raw, dtype=np.float32).tolist()
+                    self._local.set(key, embedding)
+                    metrics.incr("embedding_cache.hits")
+                    metrics.incr("embedding_cache.redis_hits")
+                    return embedding
+            except Exception as e:
+                logger.warning("Embedding cache Redis read failed", error=str(e))
+
+        metrics.incr("embedding_cache.misses")
+        return None
+
+    async def set(self, query: str, embedding: List[float]):
+        """Store an embedding locally and, if configured, in Redis"""
+        if not embedding:
+            return
+
+        key = self._key(query)
+        self._local.set(key, embedding)
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                raw = np.asarray(embedding, dtype=np.float32).tobytes()
+                await redis_client.set(key, raw, ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning("Embedding cache Redis write failed", error=str(e))
+
+    def stats(self) -> dict:
+        """Return hit/miss counts and the current hit rate"""
+        return {
+            "size": len(self._local),
+            "hits": metrics.get("embedding_cache.hits"),
+            "misses": metrics.get("embedding_cache.misses"),
+            "hit_rate": metrics.ratio("embedding_cache.hits", ("embedding_cache.hits", "embedding_cache.misses"))
+        }
+
+    def _get_redis(self):
+        """Lazily create the Redis client when a shared cache is configured"""
+        if not self._redis_url:
+            return None
+
+        if self._redis is None:
+            try:
+                import redis.asyncio as redis
+                self._redis = redis.from_url(self._redis_url)
+            except Exception as e:
+                logger.warning("Embedding cache Redis unavailable", error=str(e))
+                self._redis_url = None
+                return None
+
+        return self._redis
+
+# Global embedding cache instance
+embedding_cache: Optional[QueryEmbeddingCache] = None
+
+def get_embedding_cache() -> QueryEmbeddingCache:
+    """Get or create embedding cache instance"""
+    global embedding_cache
+    if embedding_cache is None:
+        embedding_cache = QueryEmbeddingCache(
+            model_version=settings.embedding_model_version,
+            maxsize=settings.embedding_cache_size,
+            ttl_seconds=settings.embedding_cache_ttl_seconds,
+            redis_url=settings.redis_url if settings.embedding_cache_use_redis else None
+        )
+    return embedding_cache
@@ -0,0 +1,95 @@
+from typing import Optional, Tuple
+import structlog
+from ..services.supabase_client import supabase_client
+from ..core.cache import TTLLRUCache
+from ..core.config import settings
+
+logger = structlog.get_logger()
+
+# Marks a bump whose WAL position is not recorded yet; no replica can reach it
+PENDING_LSN = "FFFFFFFF/FFFFFFFF"
+
+class IndexVersionTracker:
+    """Tracks the per-workbench index version that invalidates retrieval caches.
+
+    Alongside the version it tracks the primary WAL position of the last bump, so
+    reads for a workbench only go to replicas that have replayed that bump.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, maxsize: int = 10000):
+        self.supabase = supabase_client
+        self._versions = TTLLRUCache(maxsize, ttl_seconds)
+
+    async def get_version(self, workbench_id: str) -> int:
+        """Return the current index version, re-reading it at most once per TTL"""
+        version, _ = await self._get_state(workbench_id)
+        return version
+
+    async def get_read_lsn(self, workbench_id: str) -> Optional[int]:
+        """WAL position a replica must have replayed to serve this workbench, or None for any replica"""
+        _, lsn = await self._get_state(workbench_id)
+        return lsn
+
+    async def get_read_pool(self, workbench_id: str):
+        """Pool for reading a workbench's chunks: a replica only once it has replayed the last bump.
+
+        Results read this way may be cached under the current index version.
+        When the bump position cannot be read, the primary is used.
+        """
+        try:
+            min_lsn = await self.get_read_lsn(workbench_id)
+        except Exception as e:
+            logger.warning("Error reading workbench index position, reading from primary", workbench_id=workbench_id, error=str(e))
+            return await self.supabase.get_pool()
+        return await self.supabase.get_read_pool(min_lsn=min_lsn)
+
+    async def _get_state(self, workbench_id: str) -> Tuple[int, Optional[int]]:
+        state = self._versions.get(workbench_id)
+        if state is not None:
+            return state
+
+        pool = await self.supabase.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT index_version, index_lsn - '0/0'::pg_lsn AS index_lsn FROM workbench WHERE id = $1",
+                workbench_id
+            )
+
+        state = (int(row["index_version"] or 0), _lsn_value(row["index_lsn"])) if row else (0, None)
+        self._versions.set(workbench_id, state)
+        return state
+
+    async def bump(self, workbench_id: str) -> int:
+        """Atomically increment a workbench's index version after its chunks change"""
+        pool = await self.supabase.get_pool()
+        async with pool.acquire() as conn:
+            version = await conn.fetchval(
+                f"UPDATE workbench SET index_version = index_version + 1, index_lsn = '{PENDING_LSN}' "
+                "WHERE id = $1 RETURNING index_version",
+                workbench_id
+            )
+            # Taken after the bump commits, so replaying up to it implies the bump and its chunks
+            lsn = await conn.fetchval(
+                "UPDATE workbench SET index_lsn = pg_current_wal_lsn() WHERE id = $1 "
+                "RETURNING index_lsn - '0/0'::pg_lsn",
+                workbench_id
+            )
+
+        version = int(version or 0)
+        self._versions.set(workbench_id, (version, _lsn_value(lsn)))
+        logger.info("Bumped workbench index version", workbench_id=workbench_id, index_version=version)
+        return version
+
+def _lsn_value(lsn) -> Optional[int]:
+    """pg_lsn minus '0/0' arrives as a Decimal byte position"""
+    return int(lsn) if lsn is not None else None
+
+# Global index version tracker instance
+index_version_tracker: Optional[IndexVersionTracker] = None
+
+def get_index_version_tracker() -> IndexVersionTracker:
+    """Get or create index version tracker instance"""
+    global index_version_tracker
+    if index_version_tracker is None:
+        index_version_tracker = IndexVersionTracker(ttl_seconds=settings.index_version_ttl_seconds)
+    return index_version_tracker
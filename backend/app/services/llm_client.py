@@ -0,0 +1,245 @@
+import asyncio
+import json
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, AsyncIterator
+import httpx
+import structlog
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+class LLMError(Exception):
+    """An LLM request that failed after retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LLMClient:
+    """Client for an OpenAI-compatible chat completions API (Groq).
+
+    One pooled HTTP/2 `httpx.AsyncClient` is shared by every request in the process.
+    Requests that fail with 429/5xx or cannot connect are retried with full-jitter
+    exponential backoff, waiting at least as long as the server's Retry-After; a
+    Retry-After beyond `retry_after_max_seconds` fails the request right away.
+    Streams are only retried before the first byte is received.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        max_retries: int = 3,
+        retry_base_seconds: float = 0.5,
+        retry_max_seconds: float = 8.0,
+        retry_after_max_seconds: float = 30.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: bool = True
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retry_after_max_seconds = retry_after_max_seconds
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared pooled client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2
+            )
+        return self._client
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Return the full completion text"""
+        start = time.perf_counter()
+        response = await self._send(self._payload(messages, temperature, max_tokens, stream=False), stream=False)
+        try:
+            body = response.json()
+        finally:
+            await response.aclose()
+
+        content = body["choices"][0]["message"]["content"] or ""
+        metrics.incr("llm.latency_ms_total", (time.perf_counter() - start) * 1000)
+        logger.info(
+            "LLM completion",
+            model=self.model,
+            latency_ms=round((time.perf_counter() - start) * 1000, 1),
+            usage=body.get("usage")
+        )
+        return content
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Yield completion text deltas as the server produces them"""
+        start = time.perf_counter()
+        first_token_ms: Optional[float] = None
+        response = await self._send(self._payload(messages, temperature, max_tokens, stream=True), stream=True)
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                        metrics.incr("llm.first_token_ms_total", first_token_ms)
+                    yield delta
+        finally:
+            await response.aclose()
+
+        logger.info(
+            "LLM stream completed",
+            model=self.model,
+            first_token_ms=round(first_token_ms, 1) if first_token_ms is not None else None,
+            latency_ms=round((time.perf_counter() - start) * 1000, 1)
+        )
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        stream: bool
+    ) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": settings.llm_temperature if temperature is None else temperature,
+            "max_tokens": settings.llm_max_tokens if max_tokens is None else max_tokens,
+            "stream": stream
+        }
+
+    async def _send(self, payload: Dict[str, Any], stream: bool) -> httpx.Response:
+        """POST a completion request, retrying 429/5xx and connection failures"""
+        metrics.incr("llm.requests")
+        for attempt in range(self.max_retries + 1):
+            response: Optional[httpx.Response] = None
+            try:
+                request = self.client.build_request("POST", "/chat/completions", json=payload)
+                response = await self.client.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                if attempt == self.max_retries:
+                    metrics.incr("llm.errors")
+                    raise LLMError(f"LLM request failed: {e}") from e
+                delay = self._retry_delay(attempt, None)
+                logger.warning("LLM connection failed, retrying", attempt=attempt + 1, delay=round(delay, 3), error=str(e))
+            else:
+                if response.status_code < 400:
+                    return response
+
+                await response.aread()
+                await response.aclose()
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    metrics.incr("llm.errors")
+                    raise LLMError(
+                        f"LLM request failed with status {response.status_code}: {response.text[:200]}",
+                        status_code=response.status_code
+                    )
+                retry_after = self._retry_after(response)
+                if retry_after is not None and retry_after > self.retry_after_max_seconds:
+                    # Waiting that long would outlast the caller; retrying sooner would only be refused
+                    metrics.incr("llm.errors")
+                    raise LLMError(
+                        f"LLM request failed with status {response.status_code}: retry after {retry_after:.0f}s",
+                        status_code=response.status_code
+                    )
+                delay = self._retry_delay(attempt, retry_after)
+                logger.warning(
+                    "LLM request throttled or failed, retrying",
+                    attempt=attempt + 1,
+                    status_code=response.status_code,
+                    delay=round(delay, 3)
+                )
+
+            metrics.incr("llm.retries")
+            await asyncio.sleep(delay)
+
+        raise LLMError("LLM request failed")
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """Parse Retry-After as delta-seconds or an HTTP date"""
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+# Global LLM client instance
+llm_client: Optional[LLMClient] = None
+
+def get_llm_client() -> LLMClient:
+    """Get or create LLM client instance"""
+    global llm_client
+    if llm_client is None:
+        llm_client = LLMClient(
+            base_url=settings.llm_base_url,
+            api_key=settings.groq_api_key,
+            model=settings.llm_model,
+            connect_timeout=settings.llm_connect_timeout_seconds,
+            read_timeout=settings.llm_read_timeout_seconds,
+            max_retries=settings.llm_max_retries,
+            retry_base_seconds=settings.llm_retry_base_seconds,
+            retry_max_seconds=settings.llm_retry_max_seconds,
+            retry_after_max_seconds=settings.llm_retry_after_max_seconds,
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            http2=settings.llm_http2
+        )
+    return llm_client
@@ -0,0 +1,50 @@
+from typing import List
+import numpy as np
+
+def mmr_select(
+    query_embedding: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """Pick k candidate indices by maximal marginal relevance.
+
+    Each step takes the candidate maximising
+        lambda * sim(query, c) - (1 - lambda) * max(sim(c, selected))
+    so lambda=1 is plain relevance order and lower values favour diversity.
+    Similarities are vectorized matrix-vector products; no Python loop over candidates.
+    """
+    n = candidate_embeddings.shape[0]
+    if n == 0 or k <= 0:
+        return []
+
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    norms = np.linalg.norm(candidates, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    candidates = candidates / norms
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    if query_norm:
+        query = query / query_norm
+
+    relevance = candidates @ query
+
+    selected: List[int] = []
+    max_redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    for _ in range(min(k, n)):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        # Only the chosen row of the similarity matrix is ever needed
+        np.maximum(max_redundancy, candidates @ candidates[best], out=max_redundancy)
+
+    return selected
@@ -1,74 +1,297 @@
 import asyncpg
+import asyncio
+import heapq
+import json
+import re
 from typing import List, Dict, Any, Optional
 import structlog
 import numpy as np
 from ..services.supabase_client import supabase_client
+from ..services.embedding_cache import get_embedding_cache
+from ..services.index_versions import get_index_version_tracker
+from ..services.retrieval_cache import get_retrieval_cache
+from ..services.vector_index import get_vector_index
+from ..services.reranker import get_reranker
+from ..services.mmr import mmr_select
+from ..services.search_filters import SearchFilters, compile_filters
+from ..services.bm25_index import get_bm25_index, tokenize
+from ..core.cache import TTLLRUCache
 from ..core.config import settings
+from ..core.metrics import metrics
 
 logger = structlog.get_logger()
 
+# Cosine similarity search. The inner query is a plain ANN scan (ORDER BY distance LIMIT
+# over-fetch $5) so the planner can use the HNSW index; the similarity threshold $3 is
+# applied to its output, and the distance is computed once per row.
+# {filters} takes compiled SearchFilters predicates numbered from $6;
+# {embedding} is ", embedding" when callers need the vectors back.
+VECTOR_SEARCH_TEMPLATE = """
+SELECT id, workbench_id, file_id, content, metadata{embedding}, 1 - distance as similarity
+FROM (
+    SELECT
+        id,
+        workbench_id,
+        file_id,
+        content,
+        metadata{embedding},
+        embedding <=> $1::vector as distance
+    FROM workbench_chunks
+    WHERE workbench_id = $2{filters}
+    ORDER BY distance
+    LIMIT $5
+) nearest
+WHERE distance < 1 - $3
+ORDER BY distance
+LIMIT $4
+"""
+
+# Two-stage search for very large workbenches: an HNSW scan over 1-bit sign codes
+# (binary_quantize, Hamming distance <~>, migration 011) picks $5 candidates, which are
+# then reranked by exact cosine distance. Filter predicates are numbered from $6.
+BINARY_QUANTIZED_SEARCH_TEMPLATE = """
+SELECT id, workbench_id, file_id, content, metadata{embedding}, 1 - distance as similarity
+FROM (
+    SELECT id, workbench_id, file_id, content, metadata, embedding, embedding <=> $1::vector as distance
+    FROM (
+        SELECT id, workbench_id, file_id, content, metadata, embedding
+        FROM workbench_chunks
+        WHERE workbench_id = $2{filters}
+        ORDER BY binary_quantize(embedding)::bit({dimensions}) <~> binary_quantize($1::vector)
+        LIMIT $5
+    ) candidates
+) ranked
+WHERE distance < 1 - $3
+ORDER BY distance
+LIMIT $4
+"""
+
+# Planner row estimate for a workbench's chunk partition (migration 008); no count(*) scan
+WORKBENCH_SIZE_ESTIMATE_SQL = """
+SELECT reltuples::bigint
+FROM pg_class
+WHERE oid = to_regclass(workbench_chunks_partition_name($1::uuid))
+"""
+
+# Full-text search over OR-ed lexemes; rank normalization 32 scales ts_rank_cd into [0, 1).
+# Filter predicates are numbered from $4
+KEYWORD_SEARCH_TEMPLATE = """
+SELECT
+    id,
+    workbench_id,
+    file_id,
+    content,
+    metadata,
+    ts_rank_cd(to_tsvector('english', content), to_tsquery('english', $1), 32) as rank
+FROM workbench_chunks
+WHERE workbench_id = $2
+AND to_tsvector('english', content) @@ to_tsquery('english', $1){filters}
+ORDER BY rank DESC
+LIMIT $3
+"""
+
+# Batched variants: one row per (query ordinal, hit), each query answered by a LATERAL ANN lookup
+BATCH_VECTOR_SEARCH_TEMPLATE = """
+SELECT q.ord, c.id, c.workbench_id, c.file_id, c.content, c.metadata, c.similarity
+FROM unnest($1::vector[]) WITH ORDINALITY AS q(query_embedding, ord)
+CROSS JOIN LATERAL (
+    SELECT id, workbench_id, file_id, content, metadata, 1 - distance as similarity
+    FROM (
+        SELECT
+            id,
+            workbench_id,
+            file_id,
+            content,
+            metadata,
+            embedding <=> q.query_embedding as distance
+        FROM workbench_chunks
+        WHERE workbench_id = $2{filters}
+        ORDER BY distance
+        LIMIT $5
+    ) nearest
+    WHERE distance < 1 - $3
+    ORDER BY distance
+    LIMIT $4
+) c
+ORDER BY q.ord, c.similarity DESC
+"""
+
+BATCH_KEYWORD_SEARCH_TEMPLATE = """
+SELECT q.ord, c.id, c.workbench_id, c.file_id, c.content, c.metadata, c.rank
+FROM unnest($1::text[]) WITH ORDINALITY AS q(search_terms, ord)
+CROSS JOIN LATERAL (
+    SELECT
+        id,
+        workbench_id,
+        file_id,
+        content,
+        metadata,
+        ts_rank_cd(to_tsvector('english', content), to_tsquery('english', q.search_terms), 32) as rank
+    FROM workbench_chunks
+    WHERE workbench_id = $2
+    AND to_tsvector('english', content) @@ to_tsquery('english', q.search_terms){filters}
+    ORDER BY rank DESC
+    LIMIT $3
+) c
+ORDER BY q.ord, c.rank DESC
+"""
+
+# Identifier lookups (invoice numbers, GL codes, exact figures) answered by the pg_trgm GIN
+# index on content (migration 010). Exact mode matches any case-insensitive regex in $1, each
+# anchored at token boundaries so 3rd does not match 23rd, and scores a
+# chunk by the share of the $4 identifiers it contains, damped by how many chunks match: an
+# identifier found in one chunk scores 1.0, one found in a hundred about 0.18. Fuzzy mode
+# matches on trigram word similarity to $1. Filter predicates are numbered from $5 (exact)
+# and $4 (fuzzy).
+IDENTIFIER_EXACT_TEMPLATE = """
+WITH matches AS (
+    SELECT id, workbench_id, file_id, content, metadata, chunk_seq,
+           (SELECT count(*) FROM unnest($1::text[]) AS pattern WHERE content ~* pattern) as matched
+    FROM workbench_chunks
+    WHERE workbench_id = $2
+    AND content ~* ANY($1::text[]){filters}
+)
+SELECT id, workbench_id, file_id, content, metadata,
+       (least(matched::float8 / $4::integer, 1.0) / (1.0 + ln(count(*) OVER ())))::float8 as match_score
+FROM matches
+ORDER BY match_score DESC, chunk_seq
+LIMIT $3
+"""
+
+IDENTIFIER_FUZZY_TEMPLATE = """
+SELECT id, workbench_id, file_id, content, metadata, word_similarity($1, content)::float8 as match_score
+FROM workbench_chunks
+WHERE workbench_id = $2
+AND $1 <% content{filters}
+ORDER BY match_score DESC
+LIMIT $3
+"""
+
+# Candidate tokens for codes and figures: INV-2023-0042, GL4010, 4,512,300
+_IDENTIFIER_TOKEN = re.compile(r"[\w.,/#%-]+")
+# Figures written with thousands separators, optionally with decimals: 4,512,300 or 1,200.50
+_GROUPED_FIGURE = re.compile(r"\d{1,3}(,\d{3})+(\.\d+)?")
+# Reporting periods such as FY2023, Q3-24 or H1: they appear in nearly every chunk of a report
+_PERIOD_LABEL = re.compile(r"(?i)(fy|cy|q[1-4]|h[12])[-']?\d{0,4}")
+# Bare numbers up to this many digits (years, counts, small amounts) are too common to pin a chunk
+MAX_COMMON_NUMBER_DIGITS = 4
+# Ordinals such as 3rd or 21st
+_ORDINAL = re.compile(r"(?i)\d+(st|nd|rd|th)")
+# Year ranges such as 2022-2023, 2022-23 or 2022/23
+_YEAR_RANGE = re.compile(r"(19|20)\d{2}[-/]((19|20)\d{2}|\d{2})")
+# A word with a short number stuck on (covid19, windows10): a name, not a code
+_NUMBERED_WORD = re.compile(r"(?i)[a-z]{4,}\d{1,2}")
+# Identifier matches must not continue into a neighbouring letter or digit
+_TOKEN_START = "(^|[^[:alnum:]_])"
+_TOKEN_END = "([^[:alnum:]_]|$)"
+
+# pgvector's default hnsw.ef_search
+HNSW_DEFAULT_EF_SEARCH = 40
+
+VECTOR_SEARCH_SQL = VECTOR_SEARCH_TEMPLATE.format(filters="", embedding="")
+KEYWORD_SEARCH_SQL = KEYWORD_SEARCH_TEMPLATE.format(filters="")
+BATCH_VECTOR_SEARCH_SQL = BATCH_VECTOR_SEARCH_TEMPLATE.format(filters="")
+BATCH_KEYWORD_SEARCH_SQL = BATCH_KEYWORD_SEARCH_TEMPLATE.format(filters="")
+
+def _to_tsquery_terms(keywords: List[str]) -> str:
+    """OR together keyword lexemes as to_tsquery input; only word characters survive"""
+    terms = dict.fromkeys(token for keyword in keywords for token in tokenize(keyword))
+    return " | ".join(terms)
+
+def _is_identifier(token: str) -> bool:
+    """Code-shaped tokens only: letters mixed with digits (GL4010, INV-2023-0042), figures with
+    thousands separators, digit groups joined by - / # (4010-200) or long bare numbers.
+    Years, year ranges, ordinals, percentages, plain decimals, period labels and words with a
+    short number attached are ordinary words for search."""
+    if len(token) < 3 or token.endswith("%") or not any(char.isdigit() for char in token):
+        return False
+    if any(pattern.fullmatch(token) for pattern in (_PERIOD_LABEL, _ORDINAL, _YEAR_RANGE, _NUMBERED_WORD)):
+        return False
+    if any(char.isalpha() for char in token):
+        return True
+    if _GROUPED_FIGURE.fullmatch(token):
+        return True
+    if re.search(r"\d[-/#]\d", token):
+        return True
+    return token.isdigit() and len(token) > MAX_COMMON_NUMBER_DIGITS
+
+def _extract_identifiers(query: str) -> List[str]:
+    """Code-shaped tokens in a query, in order of appearance"""
+    identifiers = []
+    for token in _IDENTIFIER_TOKEN.findall(query):
+        token = token.strip(".,/-")
+        if _is_identifier(token) and token not in identifiers:
+            identifiers.append(token)
+    return identifiers
+
+def _match_patterns(identifiers: List[str]) -> List[str]:
+    """Token-bounded regexes, also matching figures written without thousands separators"""
+    patterns = []
+    for identifier in identifiers:
+        variants = [identifier]
+        if "," in identifier and identifier.replace(",", "").replace(".", "").isdigit():
+            variants.append(identifier.replace(",", ""))
+        for variant in variants:
+            # Escaping every non-alphanumeric character is valid in Postgres regexes too
+            escaped = re.sub(r"(\W)", r"\\\1", variant)
+            patterns.append(f"{_TOKEN_START}{escaped}{_TOKEN_END}")
+    return patterns
+
+def _is_ann_index(index_name: str) -> bool:
+    """Embedding indexes (HNSW/ivfflat, incl. per-partition copies) all carry 'embedding' in their name"""
+    return "embedding" in index_name
+
+def _collect_plan_nodes(plan: Dict[str, Any], relations: List[str], indexes: List[str]):
+    """Walk an EXPLAIN (FORMAT JSON) plan tree collecting scanned relations and indexes"""
+    if "Relation Name" in plan:
+        relations.append(plan["Relation Name"])
+    if "Index Name" in plan:
+        indexes.append(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        _collect_plan_nodes(child, relations, indexes)
+
+class RetrievalResult:
+    """Search results plus the stages that were skipped or cut short to meet the deadline"""
+
+    def __init__(self, results: List[Dict[str, Any]], degraded: Dict[str, str], elapsed_ms: float):
+        self.results = results
+        self.degraded = degraded
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def degraded_legs(self) -> List[str]:
+        return sorted(self.degraded)
+
 class RAGService:
     """RAG service for vector search and similarity matching"""
 
     def __init__(self):
         self.supabase = supabase_client
         self.embedding_dim = 1536  # OpenAI text-embedding-ada-002 dimensions
+        self.embedding_cache = get_embedding_cache()
+        self.index_versions = get_index_version_tracker()
+        self.retrieval_cache = get_retrieval_cache()
+        self.vector_index = get_vector_index()
+        self.bm25_index = get_bm25_index()
+        self._size_estimates = TTLLRUCache(10000, 300)
 
     async def search_similar_chunks(
         self,
         query: str,
         workbench_id: str,
         limit: int = 5,
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        include_embeddings: bool = False,
+        filters: Optional[SearchFilters] = None,
+        quantized: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
-        """Search for similar chunks using vector similarity"""
-        try:
-            # Generate embedding for the query (placeholder for now)
-            query_embedding = await self._generate_query_embedding(query)
-
-            # Perform vector search using pgvector
-            pool = await self.supabase.get_pool()
-
-            async with pool.acquire() as conn:
-                # Use cosine similarity search
-                query_sql = """
-                SELECT
-                    id,
-                    workbench_id,
-                    file_id,
-                    content,
-                    metadata,
-                    embedding,
-                    1 - (embedding <=> $1::vector) as similarity
-                FROM workbench_chunks
-                WHERE workbench_id = $2
-                AND 1 - (embedding <=> $1::vector) > $3
-                ORDER BY embedding <=> $1::vector
-                LIMIT $4
-                """
-
-                rows = await conn.fetch(
-                    query_sql,
-                    query_embedding,
-                    workbench_id,
-                    threshold,
-                    limit
-                )
-
-                results = []
-                for row in rows:
-                    results.append({
-                        "id": str(row["id"]),
-                        "workbench_id": str(row["workbench_id"]),
-                        "file_id": str(row["file_id"]),
-                        "content": row["content"],
-                        "metadata": row["metadata"] or {},
-                        "similarity": float(row["similarity"])
-                    })
-
-                logger.info("Vector search completed", query_length=len(query), results_count=len(results))
-                return results
+        """Search for similar chunks using vector similarity, restricted by optional filters.
 
+        `quantized` forces (True) or disables (False) the binary-quantized two-stage
+        search; by default it is used for workbenches of BINARY_QUANT_MIN_CHUNKS or more.
+        """
+        try:
+            return await self._vector_leg(query, workbench_id, limit, threshold, include_embeddings, filters, quantized)
         except Exception as e:
             logger.error("Error in vector search", error=str(e))
             return []
@@ -77,92 +300,649 @@ class RAGService:
         self,
         keywords: List[str],
         workbench_id: str,
-        limit: int = 10
+        limit: int = 10,
+        filters: Optional[SearchFilters] = None
     ) -> List[Dict[str, Any]]:
-        """Search chunks by keywords using full-text search"""
+        """Search chunks by keywords (any keyword matches), restricted by optional filters"""
         try:
-            pool = await self.supabase.get_pool()
-
-            async with pool.acquire() as conn:
-                # Build search query with multiple keywords
-                search_terms = " | ".join(keywords)
-
-                query_sql = """
-                SELECT
-                    id,
-                    workbench_id,
-                    file_id,
-                    content,
-                    metadata,
-                    ts_rank_cd(to_tsvector('english', content), plainto_tsquery('english', $1)) as rank
-                FROM workbench_chunks
-                WHERE workbench_id = $2
-                AND to_tsvector('english', content) @@ plainto_tsquery('english', $1)
-                ORDER BY rank DESC
-                LIMIT $3
-                """
-
-                rows = await conn.fetch(query_sql, search_terms, workbench_id, limit)
-
-                results = []
-                for row in rows:
-                    results.append({
-                        "id": str(row["id"]),
-                        "workbench_id": str(row["workbench_id"]),
-                        "file_id": str(row["file_id"]),
-                        "content": row["content"],
-                        "metadata": row["metadata"] or {},
-                        "rank": float(row["rank"])
-                    })
-
-                logger.info("Keyword search completed", keywords=keywords, results_count=len(results))
-                return results
-
+            return await self._keyword_leg(keywords, workbench_id, limit, filters)
         except Exception as e:
             logger.error("Error in keyword search", error=str(e))
             return []
 
+    async def search_identifiers(
+        self,
+        query: str,
+        workbench_id: str,
+        limit: int = 10,
+        fuzzy: bool = True,
+        filters: Optional[SearchFilters] = None
+    ) -> List[Dict[str, Any]]:
+        """Find chunks containing the codes or figures in a query, exactly or (as a fallback) fuzzily"""
+        try:
+            return await self._identifier_leg(_extract_identifiers(query), workbench_id, limit, fuzzy, filters)
+        except Exception as e:
+            logger.error("Error in identifier search", error=str(e))
+            return []
+
     async def hybrid_search(
         self,
         query: str,
         workbench_id: str,
         limit: int = 5,
         vector_weight: float = 0.7,
-        keyword_weight: float = 0.3
+        keyword_weight: float = 0.3,
+        rerank: Optional[bool] = None,
+        diversify: Optional[bool] = None,
+        filters: Optional[SearchFilters] = None,
+        deadline_ms: Optional[float] = None
     ) -> List[Dict[str, Any]]:
-        """Perform hybrid search combining vector and keyword search"""
+        """Perform hybrid search combining vector and keyword search, optionally diversified and reranked"""
+        retrieval = await self.hybrid_search_with_status(
+            query, workbench_id, limit, vector_weight, keyword_weight, rerank, diversify, filters, deadline_ms
+        )
+        return retrieval.results
+
+    async def hybrid_search_with_status(
+        self,
+        query: str,
+        workbench_id: str,
+        limit: int = 5,
+        vector_weight: float = 0.7,
+        keyword_weight: float = 0.3,
+        rerank: Optional[bool] = None,
+        diversify: Optional[bool] = None,
+        filters: Optional[SearchFilters] = None,
+        deadline_ms: Optional[float] = None
+    ) -> RetrievalResult:
+        """Hybrid search under a latency deadline, reporting which stages were degraded.
+
+        Both legs run concurrently; a leg still running at the deadline is
+        cancelled and the results of the legs that finished are used.
+        `deadline_ms` defaults to RETRIEVAL_DEADLINE_MS; 0 disables the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline_ms = settings.retrieval_deadline_ms if deadline_ms is None else deadline_ms
+        deadline = started + deadline_ms / 1000 if deadline_ms else None
+        degraded: Dict[str, str] = {}
+
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(deadline - loop.time(), 0.0)
+
         try:
+            rerank = settings.rerank_enabled if rerank is None else rerank
+            diversify = settings.mmr_enabled if diversify is None else diversify
+
+            # Serve repeat questions from the cache while the workbench index is unchanged
+            cache_key = None
+            index_version = await self._get_index_version(workbench_id) if settings.retrieval_cache_enabled else None
+            if index_version is not None:
+                cache_key = self.retrieval_cache.make_key(
+                    workbench_id, index_version, query, limit, vector_weight, keyword_weight, rerank, diversify,
+                    filters.cache_key() if filters is not None else None
+                )
+                cached_results = self.retrieval_cache.get(cache_key)
+                if cached_results is not None:
+                    logger.info("Hybrid search served from cache", workbench_id=workbench_id, results_count=len(cached_results))
+                    return RetrievalResult(cached_results, degraded, (loop.time() - started) * 1000)
+
             # Extract keywords from query
             keywords = await self._extract_keywords(query)
 
-            # Perform both searches
-            vector_results = await self.search_similar_chunks(query, workbench_id, limit * 2)
-            keyword_results = await self.search_by_keywords(keywords, workbench_id, limit * 2)
+            # Reranking and MMR choose the best few from a wider candidate pool
+            candidate_count = limit
+            if rerank:
+                candidate_count = max(candidate_count, settings.rerank_top_n)
+            if diversify:
+                candidate_count = max(candidate_count, settings.mmr_candidates)
+
+            # Run the legs concurrently and keep whatever finishes before the deadline
+            legs = {
+                "vector": asyncio.create_task(self._vector_leg(
+                    query, workbench_id, candidate_count * 2, include_embeddings=diversify, filters=filters
+                )),
+                "keyword": asyncio.create_task(self._keyword_leg(
+                    keywords, workbench_id, candidate_count * 2, filters=filters
+                )),
+            }
+
+            # Codes and figures are matched literally; embeddings and stemming both blur them
+            identifiers = _extract_identifiers(query) if settings.identifier_search_enabled else []
+            if identifiers:
+                legs["identifier"] = asyncio.create_task(self._identifier_leg(
+                    identifiers, workbench_id, candidate_count, filters=filters
+                ))
+
+            leg_results = await self._gather_legs(legs, remaining(), degraded)
 
             # Combine and rank results
             combined_results = await self._combine_search_results(
-                vector_results, keyword_results, vector_weight, keyword_weight, limit
+                leg_results.get("vector", []), leg_results.get("keyword", []), vector_weight, keyword_weight, candidate_count,
+                identifier_results=leg_results.get("identifier", []), identifier_weight=settings.identifier_weight
             )
 
-            logger.info("Hybrid search completed", query_length=len(query), results_count=len(combined_results))
-            return combined_results
+            if diversify:
+                if remaining() == 0:
+                    degraded["diversify"] = "deadline"
+                    combined_results = [self._strip_embedding(result) for result in combined_results[:limit]]
+                else:
+                    combined_results = await self._diversify(
+                        query, workbench_id, combined_results, limit, settings.mmr_lambda
+                    )
+
+            if rerank:
+                budget_ms = settings.rerank_budget_ms
+                if deadline is not None:
+                    budget_ms = min(budget_ms, remaining() * 1000)
+
+                reranked = None
+                if budget_ms > 0:
+                    reranked = await get_reranker().rerank(query, combined_results, limit, budget_ms)
+                if reranked is None:
+                    degraded["rerank"] = "skipped"
+                combined_results = reranked if reranked is not None else combined_results[:limit]
+
+            # Partial results are not cached, so the next request gets another chance at all legs
+            if cache_key is not None and combined_results and not degraded:
+                self.retrieval_cache.set(cache_key, combined_results)
+
+            elapsed_ms = (loop.time() - started) * 1000
+            logger.info(
+                "Hybrid search completed",
+                query_length=len(query),
+                results_count=len(combined_results),
+                elapsed_ms=round(elapsed_ms, 1),
+                degraded=degraded or None
+            )
+            return RetrievalResult(combined_results, degraded, elapsed_ms)
 
         except Exception as e:
             logger.error("Error in hybrid search", error=str(e))
+            degraded["hybrid"] = "error"
+            return RetrievalResult([], degraded, (loop.time() - started) * 1000)
+
+    async def _gather_legs(
+        self,
+        legs: Dict[str, "asyncio.Task"],
+        timeout: Optional[float],
+        degraded: Dict[str, str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Wait for search legs until the timeout; cancel stragglers and record failed legs"""
+        try:
+            _, pending = await asyncio.wait(legs.values(), timeout=timeout)
+        except asyncio.CancelledError:
+            for task in legs.values():
+                task.cancel()
+            raise
+
+        # Cancelled legs unwind in the background (asyncpg cancels the running statement);
+        # waiting for them here would spend time the deadline no longer has
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.incr("retrieval.deadline_misses")
+
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for name, task in legs.items():
+            if task in pending:
+                degraded[name] = "deadline"
+                metrics.incr(f"retrieval.deadline_misses.{name}")
+                logger.warning("Search leg missed deadline", leg=name)
+            elif task.exception() is not None:
+                degraded[name] = "error"
+                metrics.incr(f"retrieval.leg_errors.{name}")
+                logger.error("Error in search leg", leg=name, error=str(task.exception()))
+            else:
+                results[name] = task.result()
+        return results
+
+    async def _vector_leg(
+        self,
+        query: str,
+        workbench_id: str,
+        limit: int,
+        threshold: float = 0.7,
+        include_embeddings: bool = False,
+        filters: Optional[SearchFilters] = None,
+        quantized: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """Vector similarity search; raises on failure"""
+        # Generate embedding for the query (placeholder for now)
+        query_embedding = await self._generate_query_embedding(query)
+        if not query_embedding:
+            raise ValueError("Query embedding could not be generated")
+
+        filter_sql, filter_args = compile_filters(filters, first_param=6)
+
+        # Serve small, hot workbenches from the in-process index (unfiltered searches only)
+        if settings.vector_index_enabled and not filter_sql:
+            index_version = await self._get_index_version(workbench_id)
+            if index_version is not None:
+                results = await self.vector_index.search(
+                    workbench_id, index_version, query_embedding, limit, threshold, include_embeddings
+                )
+                if results is not None:
+                    logger.info("Vector search served from in-memory index", query_length=len(query), results_count=len(results))
+                    return results
+
+        if quantized is None:
+            quantized = await self._use_binary_quantization(workbench_id)
+
+        # Perform vector search using pgvector
+        pool = await self.index_versions.get_read_pool(workbench_id)
+
+        async with pool.acquire() as conn:
+            embedding_column = ", embedding" if include_embeddings else ""
+            if quantized:
+                metrics.incr("retrieval.binary_quantized_searches")
+                fetch_limit = max(settings.binary_quant_candidates, self._overfetch_limit(limit))
+                query_sql = BINARY_QUANTIZED_SEARCH_TEMPLATE.format(
+                    filters=filter_sql, embedding=embedding_column, dimensions=self.embedding_dim
+                )
+            else:
+                fetch_limit = self._overfetch_limit(limit)
+                query_sql = VECTOR_SEARCH_TEMPLATE.format(filters=filter_sql, embedding=embedding_column)
+
+            rows = await self._fetch_vector_rows(
+                conn,
+                query_sql,
+                [query_embedding, workbench_id, threshold, limit, fetch_limit, *filter_args],
+                self._ef_search(fetch_limit, filtered=bool(filter_sql))
+            )
+
+        results = []
+        for row in rows:
+            result = {
+                "id": str(row["id"]),
+                "workbench_id": str(row["workbench_id"]),
+                "file_id": str(row["file_id"]),
+                "content": row["content"],
+                "metadata": row["metadata"] or {},
+                "similarity": float(row["similarity"])
+            }
+            if include_embeddings:
+                result["embedding"] = row["embedding"]
+            results.append(result)
+
+        logger.info("Vector search completed", query_length=len(query), results_count=len(results))
+        return results
+
+    async def _identifier_leg(
+        self,
+        identifiers: List[str],
+        workbench_id: str,
+        limit: int,
+        fuzzy: bool = True,
+        filters: Optional[SearchFilters] = None
+    ) -> List[Dict[str, Any]]:
+        """Trigram-indexed token match on identifiers, falling back to word similarity; raises on failure"""
+        if not identifiers:
             return []
 
+        pool = await self.index_versions.get_read_pool(workbench_id)
+        async with pool.acquire() as conn:
+            filter_sql, filter_args = compile_filters(filters, first_param=5)
+            rows = await conn.fetch(
+                IDENTIFIER_EXACT_TEMPLATE.format(filters=filter_sql),
+                _match_patterns(identifiers), workbench_id, limit, len(identifiers), *filter_args
+            )
+
+            if not rows and fuzzy:
+                filter_sql, filter_args = compile_filters(filters, first_param=4)
+                rows = await conn.fetch(
+                    IDENTIFIER_FUZZY_TEMPLATE.format(filters=filter_sql),
+                    max(identifiers, key=len), workbench_id, limit, *filter_args
+                )
+
+        results = [
+            {
+                "id": str(row["id"]),
+                "workbench_id": str(row["workbench_id"]),
+                "file_id": str(row["file_id"]),
+                "content": row["content"],
+                "metadata": row["metadata"] or {},
+                "match_score": float(row["match_score"])
+            }
+            for row in rows
+        ]
+
+        logger.info("Identifier search completed", identifiers=identifiers, results_count=len(results))
+        return results
+
+    async def _keyword_leg(
+        self,
+        keywords: List[str],
+        workbench_id: str,
+        limit: int,
+        filters: Optional[SearchFilters] = None
+    ) -> List[Dict[str, Any]]:
+        """Keyword search with OR semantics; raises on failure"""
+        # Unfiltered searches are answered by the in-process BM25 index once it is loaded
+        if settings.bm25_index_enabled and (filters is None or filters.is_empty):
+            index_version = await self._get_index_version(workbench_id)
+            if index_version is not None:
+                results = await self.bm25_index.search(workbench_id, index_version, keywords, limit)
+                if results is not None:
+                    logger.info("Keyword search served from BM25 index", keywords=keywords, results_count=len(results))
+                    return results
+
+        search_terms = _to_tsquery_terms(keywords)
+        if not search_terms:
+            return []
+
+        pool = await self.index_versions.get_read_pool(workbench_id)
+
+        async with pool.acquire() as conn:
+            filter_sql, filter_args = compile_filters(filters, first_param=4)
+            query_sql = KEYWORD_SEARCH_TEMPLATE.format(filters=filter_sql) if filter_sql else KEYWORD_SEARCH_SQL
+            rows = await conn.fetch(query_sql, search_terms, workbench_id, limit, *filter_args)
+
+        results = []
+        for row in rows:
+            results.append({
+                "id": str(row["id"]),
+                "workbench_id": str(row["workbench_id"]),
+                "file_id": str(row["file_id"]),
+                "content": row["content"],
+                "metadata": row["metadata"] or {},
+                "rank": float(row["rank"])
+            })
+
+        logger.info("Keyword search completed", keywords=keywords, results_count=len(results))
+        return results
+
+    async def company_search(
+        self,
+        query: str,
+        workbenches: List[Dict[str, Any]],
+        limit: int = 10,
+        per_workbench_limit: int = 5,
+        concurrency: Optional[int] = None,
+        filters: Optional[SearchFilters] = None
+    ) -> List[Dict[str, Any]]:
+        """Search many workbenches concurrently and merge their results into one top-k.
+
+        `workbenches` are the already access-checked workbench rows (id, name).
+        Each result carries its workbench id and name as provenance.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.search_fanout_concurrency)
+
+        async def search_workbench(workbench: Dict[str, Any]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                results = await self.hybrid_search(query, str(workbench["id"]), per_workbench_limit, filters=filters)
+            return [
+                {**result, "workbench_id": str(workbench["id"]), "workbench_name": workbench.get("name")}
+                for result in results
+            ]
+
+        per_workbench_results = await asyncio.gather(
+            *(search_workbench(workbench) for workbench in workbenches)
+        )
+
+        merged = heapq.nlargest(
+            limit,
+            (result for results in per_workbench_results for result in results),
+            key=lambda result: result.get("rerank_score", result.get("score", 0.0))
+        )
+
+        logger.info("Company search completed", workbenches=len(workbenches), results_count=len(merged))
+        return merged
+
+    async def batch_search(
+        self,
+        queries: List[str],
+        workbench_id: str,
+        limit: int = 5,
+        vector_weight: float = 0.7,
+        keyword_weight: float = 0.3,
+        threshold: float = 0.7,
+        filters: Optional[SearchFilters] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Hybrid search for many queries at once, returning one result list per query in order.
+
+        All queries are embedded as one matrix, and both legs run as a single
+        LATERAL-join statement each over one pooled connection.
+        """
+        if not queries:
+            return []
+
+        try:
+            query_embeddings = await self._generate_query_embeddings(queries)
+            search_terms = [_to_tsquery_terms(await self._extract_keywords(query)) for query in queries]
+
+            vector_results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+            keyword_results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+
+            vector_filter_sql, vector_filter_args = compile_filters(filters, first_param=6)
+            keyword_filter_sql, keyword_filter_args = compile_filters(filters, first_param=4)
+
+            pool = await self.index_versions.get_read_pool(workbench_id)
+            async with pool.acquire() as conn:
+                fetch_limit = self._overfetch_limit(limit * 2)
+                vector_rows = await self._fetch_vector_rows(
+                    conn,
+                    BATCH_VECTOR_SEARCH_TEMPLATE.format(filters=vector_filter_sql),
+                    [query_embeddings, workbench_id, threshold, limit * 2, fetch_limit, *vector_filter_args],
+                    self._ef_search(fetch_limit, filtered=bool(vector_filter_sql))
+                )
+                keyword_rows = await conn.fetch(
+                    BATCH_KEYWORD_SEARCH_TEMPLATE.format(filters=keyword_filter_sql),
+                    search_terms, workbench_id, limit * 2, *keyword_filter_args
+                )
+
+            for row in vector_rows:
+                vector_results[row["ord"] - 1].append({
+                    "id": str(row["id"]),
+                    "workbench_id": str(row["workbench_id"]),
+                    "file_id": str(row["file_id"]),
+                    "content": row["content"],
+                    "metadata": row["metadata"] or {},
+                    "similarity": float(row["similarity"])
+                })
+
+            for row in keyword_rows:
+                keyword_results[row["ord"] - 1].append({
+                    "id": str(row["id"]),
+                    "workbench_id": str(row["workbench_id"]),
+                    "file_id": str(row["file_id"]),
+                    "content": row["content"],
+                    "metadata": row["metadata"] or {},
+                    "rank": float(row["rank"])
+                })
+
+            results = [
+                await self._combine_search_results(vectors, keywords, vector_weight, keyword_weight, limit)
+                for vectors, keywords in zip(vector_results, keyword_results)
+            ]
+
+            logger.info("Batch search completed", queries=len(queries), workbench_id=workbench_id)
+            return results
+
+        except Exception as e:
+            logger.error("Error in batch search", error=str(e))
+            return [[] for _ in queries]
+
+    async def explain_search(self, workbench_id: str) -> Dict[str, Any]:
+        """EXPLAIN the vector and keyword queries for a workbench.
+
+        Reports the relations and indexes each plan touches, so operators can
+        confirm that queries prune to the workbench's own chunk partition and
+        that the vector query is answered by the ANN index (`ann_index_used`).
+        """
+        probe_embedding = [1.0] * self.embedding_dim
+        statements = {
+            "vector": (VECTOR_SEARCH_SQL, probe_embedding, workbench_id, 0.0, 5, self._overfetch_limit(5)),
+            "keyword": (KEYWORD_SEARCH_SQL, "probe", workbench_id, 5),
+        }
+
+        pool = await self.supabase.get_read_pool()
+        report = {}
+        async with pool.acquire() as conn:
+            for name, (query_sql, *args) in statements.items():
+                plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query_sql}", *args)
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+
+                relations: List[str] = []
+                indexes: List[str] = []
+                _collect_plan_nodes(plan[0]["Plan"], relations, indexes)
+
+                chunk_relations = sorted({r for r in relations if r.startswith("workbench_chunks")})
+                report[name] = {
+                    "relations": chunk_relations,
+                    "indexes": sorted(set(indexes)),
+                    "single_partition": len(chunk_relations) == 1,
+                    "ann_index_used": any(_is_ann_index(index) for index in indexes)
+                }
+
+        return report
+
+    async def _fetch_vector_rows(self, conn: asyncpg.Connection, query_sql: str, args: List[Any], ef_search: Optional[int]):
+        """Run a vector statement, widening the HNSW candidate list for this transaction if needed"""
+        if ef_search is None:
+            return await conn.fetch(query_sql, *args)
+
+        async with conn.transaction():
+            await conn.execute("SELECT set_config('hnsw.ef_search', $1, true)", str(ef_search))
+            return await conn.fetch(query_sql, *args)
+
+    async def _use_binary_quantization(self, workbench_id: str) -> bool:
+        """Whether a workbench is large enough for the binary-quantized two-stage search"""
+        if not settings.binary_quant_enabled:
+            return False
+
+        size = self._size_estimates.get(workbench_id)
+        if size is None:
+            try:
+                pool = await self.supabase.get_read_pool()
+                async with pool.acquire() as conn:
+                    size = await conn.fetchval(WORKBENCH_SIZE_ESTIMATE_SQL, workbench_id) or 0
+            except Exception as e:
+                logger.warning("Error estimating workbench size", workbench_id=workbench_id, error=str(e))
+                size = 0
+            self._size_estimates.set(workbench_id, size)
+
+        return size >= settings.binary_quant_min_chunks
+
+    @staticmethod
+    def _overfetch_limit(limit: int) -> int:
+        """Rows the ANN scan returns before the similarity threshold is applied"""
+        return max(limit, int(limit * settings.vector_overfetch_factor))
+
+    @staticmethod
+    def _ef_search(fetch_limit: int, filtered: bool) -> Optional[int]:
+        """HNSW candidate list size needed for a scan, or None when the server default suffices.
+
+        An HNSW scan returns at most ef_search rows, and WHERE predicates are applied
+        to those candidates, so over-fetches and selective filters need a wider list.
+        """
+        ef_search = max(fetch_limit, settings.vector_filter_ef_search if filtered else 0)
+        return ef_search if ef_search > HNSW_DEFAULT_EF_SEARCH else None
+
+    async def embed_query(self, query: str) -> List[float]:
+        """Embedding for query text as used by search; empty if it could not be generated"""
+        return await self._generate_query_embedding(query)
+
+    async def _diversify(
+        self,
+        query: str,
+        workbench_id: str,
+        candidates: List[Dict[str, Any]],
+        limit: int,
+        lambda_mult: float
+    ) -> List[Dict[str, Any]]:
+        """Drop near-duplicate candidates (e.g. overlapping chunk windows) with MMR"""
+        try:
+            missing_ids = [c["id"] for c in candidates if c.get("embedding") is None]
+            fetched = await self._fetch_embeddings(workbench_id, missing_ids) if missing_ids else {}
+
+            embedded = []
+            for candidate in candidates:
+                embedding = candidate.get("embedding")
+                if embedding is None:
+                    embedding = fetched.get(candidate["id"])
+                if embedding is not None:
+                    embedded.append((candidate, embedding))
+
+            query_embedding = await self._generate_query_embedding(query)
+            if not embedded or not query_embedding:
+                return [self._strip_embedding(c) for c in candidates[:limit]]
+
+            selected = mmr_select(
+                np.asarray(query_embedding, dtype=np.float32),
+                np.stack([np.asarray(embedding, dtype=np.float32) for _, embedding in embedded]),
+                limit,
+                lambda_mult
+            )
+            return [self._strip_embedding(embedded[i][0]) for i in selected]
+
+        except Exception as e:
+            logger.error("Error diversifying search results", error=str(e))
+            return [self._strip_embedding(c) for c in candidates[:limit]]
+
+    async def _fetch_embeddings(self, workbench_id: str, chunk_ids: List[str]) -> Dict[str, Any]:
+        """Fetch stored embeddings for candidates that came from the keyword leg"""
+        pool = await self.index_versions.get_read_pool(workbench_id)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, embedding FROM workbench_chunks WHERE workbench_id = $1 AND id = ANY($2::uuid[])",
+                workbench_id,
+                chunk_ids
+            )
+        return {str(row["id"]): row["embedding"] for row in rows if row["embedding"] is not None}
+
+    @staticmethod
+    def _strip_embedding(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in result.items() if key != "embedding"}
+
+    async def _get_index_version(self, workbench_id: str) -> Optional[int]:
+        """Get the workbench index version, or None if it cannot be read (caches are skipped)"""
+        try:
+            return await self.index_versions.get_version(workbench_id)
+        except Exception as e:
+            logger.warning("Error reading workbench index version", workbench_id=workbench_id, error=str(e))
+            return None
+
     async def _generate_query_embedding(self, query: str) -> List[float]:
-        """Generate embedding for query text (placeholder implementation)"""
+        """Generate embedding for query text, served from the embedding cache when possible"""
         try:
-            # Placeholder: In real implementation, use OpenAI or similar
-            # For now, generate random embedding of correct dimensions
-            import random
-            return [random.random() for _ in range(self.embedding_dim)]
+            cached = await self.embedding_cache.get(query)
+            if cached is not None:
+                return cached
+
+            embedding = await self._embed_query(query)
+            await self.embedding_cache.set(query, embedding)
+            return embedding
 
         except Exception as e:
             logger.error("Error generating query embedding", error=str(e))
             return []
 
+    async def _generate_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries, running the model once over all cache misses"""
+        embeddings: List[Optional[List[float]]] = [await self.embedding_cache.get(query) for query in queries]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            matrix = await self._embed_queries([queries[i] for i in missing])
+            for i, embedding in zip(missing, matrix.tolist()):
+                embeddings[i] = embedding
+                await self.embedding_cache.set(queries[i], embedding)
+
+        return embeddings
+
+    async def _embed_query(self, query: str) -> List[float]:
+        """Run the embedding model for query text"""
+        matrix = await self._embed_queries([query])
+        return matrix[0].tolist()
+
+    async def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Run the embedding model over a batch of queries as one matrix (placeholder implementation)"""
+        # Placeholder: In real implementation, use OpenAI or similar
+        # For now, generate random embeddings of correct dimensions
+        return np.random.random((len(queries), self.embedding_dim)).astype(np.float32)
+
     async def _extract_keywords(self, query: str, max_keywords: int = 5) -> List[str]:
         """Extract keywords from query text"""
         try:
@@ -185,9 +965,11 @@ class RAGService:
         keyword_results: List[Dict],
         vector_weight: float,
         keyword_weight: float,
-        limit: int
+        limit: int,
+        identifier_results: Optional[List[Dict]] = None,
+        identifier_weight: float = 0.0
     ) -> List[Dict[str, Any]]:
-        """Combine vector and keyword search results"""
+        """Combine vector, keyword and identifier search results"""
         try:
             # Create a combined score for each result
             combined_scores = {}
@@ -224,6 +1006,20 @@ class RAGService:
                         "combined_score": keyword_score * keyword_weight
                     }
 
+            # Literal identifier matches add on top of the other scores
+            for result in identifier_results or []:
+                result_id = result["id"]
+                identifier_score = result["match_score"] * identifier_weight
+
+                if result_id not in combined_scores:
+                    combined_scores[result_id] = {
+                        "result": result,
+                        "vector_score": 0.0,
+                        "keyword_score": 0.0,
+                        "combined_score": 0.0
+                    }
+                combined_scores[result_id]["combined_score"] += identifier_score
+
             # Sort by combined score and return top results
             sorted_results = sorted(
                 combined_scores.values(),
@@ -231,7 +1027,10 @@ class RAGService:
                 reverse=True
             )
 
-            return [item["result"] for item in sorted_results[:limit]]
+            return [
+                {**item["result"], "score": item["combined_score"]}
+                for item in sorted_results[:limit]
+            ]
 
         except Exception as e:
             logger.error("Error combining search results", error=str(e))
@@ -144,42 +144,42 @@ class ReportService:
 
     async def _get_workbench_data(self, workbench_id: str) -> Dict[str, Any]:
         """Get workbench information"""
-        result = self.supabase.client.table("workbench").select("*").eq("id", workbench_id).execute()
+        result = self.supabase.read_client.table("workbench").select("*").eq("id", workbench_id).execute()
         return result.data[0] if result.data else {}
 
     async def _get_files_data(self, workbench_id: str) -> List[Dict[str, Any]]:
         """Get workbench files information"""
-        result = self.supabase.client.table("workbench_files").select("*").eq("workbench_id", workbench_id).execute()
+        result = self.supabase.read_client.table("workbench_files").select("*").eq("workbench_id", workbench_id).execute()
         return result.data if result.data else []
 
     async def _get_members_data(self, workbench_id: str) -> List[Dict[str, Any]]:
         """Get workbench members information"""
-        result = self.supabase.client.table("workbench_members").select("*").eq("workbench_id", workbench_id).execute()
+        result = self.supabase.read_client.table("workbench_members").select("*").eq("workbench_id", workbench_id).execute()
         return result.data if result.data else []
 
     async def _get_chunks_data(self, workbench_id: str) -> List[Dict[str, Any]]:
         """Get workbench chunks information"""
-        result = self.supabase.client.table("workbench_chunks").select("*").eq("workbench_id", workbench_id).execute()
+        result = self.supabase.read_client.table("workbench_chunks").select("*").eq("workbench_id", workbench_id).execute()
         return result.data if result.data else []
 
     async def _get_sessions_data(self, user_id: str, workbench_id: str) -> List[Dict[str, Any]]:
         """Get chat sessions for workbench"""
-        result = self.supabase.client.table("session").select("*").eq("user_id", user_id).eq("workbench_id", workbench_id).execute()
+        result = self.supabase.read_client.table("session").select("*").eq("user_id", user_id).eq("workbench_id", workbench_id).execute()
         return result.data if result.data else []
 
     async def _get_company_data(self, company_id: str) -> Dict[str, Any]:
         """Get company information"""
-        result = self.supabase.client.table("company").select("*").eq("company_id", company_id).execute()
+        result = self.supabase.read_client.table("company").select("*").eq("company_id", company_id).execute()
         return result.data[0] if result.data else {}
 
     async def _get_company_workbenches(self, company_id: str) -> List[Dict[str, Any]]:
         """Get all workbenches for a company"""
-        result = self.supabase.client.table("workbench").select("*").eq("company_id", company_id).execute()
+        result = self.supabase.read_client.table("workbench").select("*").eq("company_id", company_id).execute()
         return result.data if result.data else []
 
     async def _get_company_members(self, company_id: str) -> List[Dict[str, Any]]:
         """Get company members information"""
-        result = self.supabase.client.table("company_members").select("*").eq("company_id", company_id).execute()
+        result = self.supabase.read_client.table("company_members").select("*").eq("company_id", company_id).execute()
         return result.data if result.data else []
 
     async def _generate_summary_report(
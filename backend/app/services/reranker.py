@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import structlog
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs with a local cross-encoder on a dedicated thread pool"""
+
+    def __init__(self, model_name: str, max_workers: int = 1):
+        self.model_name = model_name
+        # The model releases the GIL during inference, so threads keep the event loop free
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rerank")
+        self._max_workers = max_workers
+        self._model = None
+        self._model_lock = threading.Lock()
+        # Jobs submitted and not yet finished, including ones whose caller already timed out
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def _get_model(self):
+        """Load the cross-encoder once, on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+                    logger.info("Loaded rerank model", model=self.model_name)
+        return self._model
+
+    def _score(self, query: str, passages: List[str]) -> List[float]:
+        """Score all passages in a single batched forward pass"""
+        model = self._get_model()
+        scores = model.predict([(query, passage) for passage in passages], batch_size=len(passages))
+        return [float(score) for score in scores]
+
+    async def warmup(self):
+        """Load the model ahead of the first request so it does not eat the latency budget"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._score, "warmup", ["warmup"])
+        except Exception as e:
+            logger.error("Error warming up rerank model", model=self.model_name, error=str(e))
+
+    async def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        limit: int,
+        budget_ms: float
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Reorder candidates by cross-encoder score; returns None if busy or over budget"""
+        if not candidates:
+            return []
+
+        # A timed-out job keeps its worker until it finishes; queueing behind it would
+        # only spend this request's budget waiting, so keep the fused order instead
+        with self._in_flight_lock:
+            if self._in_flight >= self._max_workers:
+                metrics.incr("rerank.busy")
+                return None
+            self._in_flight += 1
+
+        job = self._executor.submit(self._score, query, [candidate["content"] for candidate in candidates])
+        job.add_done_callback(self._job_done)
+
+        try:
+            scores = await asyncio.wait_for(asyncio.wrap_future(job), timeout=budget_ms / 1000)
+        except asyncio.TimeoutError:
+            metrics.incr("rerank.budget_exceeded")
+            logger.warning("Rerank skipped: latency budget exceeded", budget_ms=budget_ms, candidates=len(candidates))
+            return None
+        except Exception as e:
+            metrics.incr("rerank.errors")
+            logger.error("Error reranking candidates", error=str(e))
+            return None
+
+        metrics.incr("rerank.completed")
+        ranked = sorted(zip(candidates, scores), key=lambda pair: pair[1], reverse=True)
+        return [{**candidate, "rerank_score": score} for candidate, score in ranked[:limit]]
+
+    def _job_done(self, _job):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+# Global reranker instance
+reranker: Optional[CrossEncoderReranker] = None
+
+def get_reranker() -> CrossEncoderReranker:
+    """Get or create reranker instance"""
+    global reranker
+    if reranker is None:
+        reranker = CrossEncoderReranker(settings.rerank_model, max_workers=settings.rerank_workers)
+    return reranker
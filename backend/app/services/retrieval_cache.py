@@ -0,0 +1,43 @@
+from typing import List, Dict, Any, Optional, Tuple
+from ..core.cache import TTLLRUCache
+from ..core.config import settings
+from ..core.metrics import metrics
+
+class RetrievalResultCache:
+    """Caches search results keyed by workbench index version so re-indexing invalidates them"""
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: int = 600):
+        self._cache = TTLLRUCache(maxsize, ttl_seconds)
+
+    @staticmethod
+    def make_key(workbench_id: str, index_version: int, query: str, *params: Any) -> Tuple:
+        """Build a cache key from the workbench, its index version, the query and search parameters"""
+        normalized_query = " ".join(query.lower().split())
+        return (workbench_id, index_version, normalized_query) + tuple(params)
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of cached results, or None on a miss"""
+        results = self._cache.get(key)
+        if results is None:
+            metrics.incr("retrieval_cache.misses")
+            return None
+
+        metrics.incr("retrieval_cache.hits")
+        return [dict(result) for result in results]
+
+    def set(self, key: Tuple, results: List[Dict[str, Any]]):
+        """Store a copy of search results"""
+        self._cache.set(key, [dict(result) for result in results])
+
+# Global retrieval cache instance
+retrieval_cache: Optional[RetrievalResultCache] = None
+
+def get_retrieval_cache() -> RetrievalResultCache:
+    """Get or create retrieval cache instance"""
+    global retrieval_cache
+    if retrieval_cache is None:
+        retrieval_cache = RetrievalResultCache(
+            maxsize=settings.retrieval_cache_size,
+            ttl_seconds=settings.retrieval_cache_ttl_seconds
+        )
+    return retrieval_cache
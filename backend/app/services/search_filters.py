@@ -0,0 +1,79 @@
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+class SearchFilters:
+    """Structured retrieval filters, compiled into indexed SQL predicates on workbench_chunks.
+
+    - file_ids:        file_id = ANY(...)            (workbench_chunks_file_id_idx)
+    - metadata:        metadata @> {...}             (GIN jsonb_path_ops index, migration 009)
+    - file_types and
+      uploaded_after/before: semi-join on workbench_files (workbench_id, created_at) index
+    """
+
+    def __init__(
+        self,
+        file_ids: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        file_types: Optional[List[str]] = None,
+        uploaded_after: Optional[datetime] = None,
+        uploaded_before: Optional[datetime] = None
+    ):
+        self.file_ids = sorted(set(file_ids)) if file_ids else None
+        self.metadata = metadata or None
+        self.file_types = sorted(set(file_types)) if file_types else None
+        self.uploaded_after = uploaded_after
+        self.uploaded_before = uploaded_before
+
+    @property
+    def is_empty(self) -> bool:
+        return not any((self.file_ids, self.metadata, self.file_types, self.uploaded_after, self.uploaded_before))
+
+    @property
+    def joins_files(self) -> bool:
+        return bool(self.file_types or self.uploaded_after or self.uploaded_before)
+
+    def cache_key(self) -> str:
+        """Stable representation for retrieval cache keys"""
+        return json.dumps({
+            "file_ids": self.file_ids,
+            "metadata": self.metadata,
+            "file_types": self.file_types,
+            "uploaded_after": self.uploaded_after.isoformat() if self.uploaded_after else None,
+            "uploaded_before": self.uploaded_before.isoformat() if self.uploaded_before else None
+        }, sort_keys=True, default=str)
+
+    def to_sql(self, first_param: int, workbench_param: str = "$2") -> Tuple[str, List[Any]]:
+        """Compile to `AND ...` predicates numbered from $first_param, plus their arguments"""
+        clauses: List[str] = []
+        args: List[Any] = []
+
+        def param(value: Any) -> str:
+            args.append(value)
+            return f"${first_param + len(args) - 1}"
+
+        if self.file_ids:
+            clauses.append(f"file_id = ANY({param(self.file_ids)}::uuid[])")
+
+        if self.metadata:
+            clauses.append(f"metadata @> {param(self.metadata)}::jsonb")
+
+        if self.joins_files:
+            file_clauses = [f"f.workbench_id = {workbench_param}"]
+            if self.uploaded_after:
+                file_clauses.append(f"f.created_at >= {param(self.uploaded_after)}")
+            if self.uploaded_before:
+                file_clauses.append(f"f.created_at < {param(self.uploaded_before)}")
+            if self.file_types:
+                file_clauses.append(f"f.file_type = ANY({param(self.file_types)}::text[])")
+            clauses.append(
+                "file_id IN (SELECT f.id FROM workbench_files f WHERE " + " AND ".join(file_clauses) + ")"
+            )
+
+        return "".join(f"\nAND {clause}" for clause in clauses), args
+
+def compile_filters(filters: Optional[SearchFilters], first_param: int) -> Tuple[str, List[Any]]:
+    """Compile optional filters; no filters compiles to an empty predicate"""
+    if filters is None or filters.is_empty:
+        return "", []
+    return filters.to_sql(first_param)
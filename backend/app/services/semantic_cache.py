@@ -0,0 +1,157 @@
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import structlog
+import numpy as np
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+class SemanticCacheEntry:
+    """A previously answered question with the retrieval and response it produced"""
+
+    def __init__(self, query: str, context_chunks: List[Dict[str, Any]], response: str, context_stats: Dict[str, Any]):
+        self.query = query
+        self.context_chunks = context_chunks
+        self.response = response
+        self.context_stats = context_stats
+        self.created_at = time.monotonic()
+
+class WorkbenchSemanticCache:
+    """Recent questions for one workbench at one index version, newest last"""
+
+    def __init__(self, index_version: int):
+        self.index_version = index_version
+        self.entries: List[SemanticCacheEntry] = []
+        self.embeddings: Optional[np.ndarray] = None
+
+class SemanticQueryCache:
+    """Per-workbench cache that answers paraphrased questions from a near-identical earlier one.
+
+    A lookup matches the query embedding against recent query embeddings of the
+    same workbench; the best match at or above `threshold` cosine similarity is a hit.
+    A workbench's entries are dropped as soon as its index version changes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries_per_workbench: int = 256,
+        max_workbenches: int = 1000,
+        ttl_seconds: int = 1800
+    ):
+        self.threshold = threshold
+        self.max_entries_per_workbench = max_entries_per_workbench
+        self.max_workbenches = max_workbenches
+        self.ttl_seconds = ttl_seconds
+        self._workbenches: "OrderedDict[str, WorkbenchSemanticCache]" = OrderedDict()
+
+    def lookup(self, workbench_id: str, index_version: int, query_embedding: List[float]) -> Optional[SemanticCacheEntry]:
+        """Return the cached entry for the most similar recent question, or None on a miss"""
+        cache = self._current(workbench_id, index_version)
+        if cache is None or not cache.entries:
+            metrics.incr("semantic_cache.misses")
+            return None
+
+        query = self._normalize(query_embedding)
+        if query is None or query.shape[0] != cache.embeddings.shape[1]:
+            metrics.incr("semantic_cache.misses")
+            return None
+
+        similarities = cache.embeddings @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            metrics.incr("semantic_cache.misses")
+            return None
+
+        metrics.incr("semantic_cache.hits")
+        self._workbenches.move_to_end(workbench_id)
+        entry = cache.entries[best]
+        logger.info(
+            "Semantic cache hit",
+            workbench_id=workbench_id,
+            similarity=float(similarities[best]),
+            cached_query_length=len(entry.query)
+        )
+        return entry
+
+    def store(
+        self,
+        workbench_id: str,
+        index_version: int,
+        query: str,
+        query_embedding: List[float],
+        context_chunks: List[Dict[str, Any]],
+        response: str,
+        context_stats: Dict[str, Any]
+    ):
+        """Remember a question and its answer for this workbench index version"""
+        embedding = self._normalize(query_embedding)
+        if embedding is None:
+            return
+
+        cache = self._current(workbench_id, index_version)
+        if cache is None or (cache.embeddings is not None and cache.embeddings.shape[1] != embedding.shape[0]):
+            cache = WorkbenchSemanticCache(index_version)
+            self._workbenches[workbench_id] = cache
+            while len(self._workbenches) > self.max_workbenches:
+                self._workbenches.popitem(last=False)
+
+        self._workbenches.move_to_end(workbench_id)
+        cache.entries.append(SemanticCacheEntry(query, [dict(chunk) for chunk in context_chunks], response, dict(context_stats)))
+        row = embedding[np.newaxis, :]
+        cache.embeddings = row if cache.embeddings is None else np.concatenate([cache.embeddings, row])
+
+        overflow = len(cache.entries) - self.max_entries_per_workbench
+        if overflow > 0:
+            cache.entries = cache.entries[overflow:]
+            cache.embeddings = cache.embeddings[overflow:]
+
+    def invalidate(self, workbench_id: str):
+        """Drop every cached question for a workbench"""
+        self._workbenches.pop(workbench_id, None)
+
+    def _current(self, workbench_id: str, index_version: int) -> Optional[WorkbenchSemanticCache]:
+        """Return the workbench's cache after dropping stale versions and expired entries"""
+        cache = self._workbenches.get(workbench_id)
+        if cache is None:
+            return None
+
+        if cache.index_version != index_version:
+            self.invalidate(workbench_id)
+            metrics.incr("semantic_cache.invalidations")
+            return None
+
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = 0
+        while expired < len(cache.entries) and cache.entries[expired].created_at < cutoff:
+            expired += 1
+        if expired:
+            cache.entries = cache.entries[expired:]
+            cache.embeddings = cache.embeddings[expired:] if cache.entries else None
+
+        return cache
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector) if vector.size else 0.0
+        if norm == 0:
+            return None
+        return vector / norm
+
+# Global semantic query cache instance
+semantic_cache: Optional[SemanticQueryCache] = None
+
+def get_semantic_cache() -> SemanticQueryCache:
+    """Get or create semantic query cache instance"""
+    global semantic_cache
+    if semantic_cache is None:
+        semantic_cache = SemanticQueryCache(
+            threshold=settings.semantic_cache_threshold,
+            max_entries_per_workbench=settings.semantic_cache_size,
+            max_workbenches=settings.semantic_cache_max_workbenches,
+            ttl_seconds=settings.semantic_cache_ttl_seconds
+        )
+    return semantic_cache
@@ -1,34 +1,240 @@
 from supabase import create_client, Client
+import asyncio
 import asyncpg
-from typing import Optional
+import json
+import time
+from typing import List, Optional
 import structlog
-from .config import settings
+import numpy as np
+from ..core.config import settings
+from ..core.metrics import metrics
 
 logger = structlog.get_logger()
 
+def _encode_vector(value) -> str:
+    """Encode a list or array of floats as a pgvector text literal"""
+    return "[" + ",".join(str(float(x)) for x in value) + "]"
+
+def _decode_vector(value: str) -> np.ndarray:
+    """Decode a pgvector text literal into a float32 array"""
+    return np.fromstring(value[1:-1], sep=",", dtype=np.float32)
+
+async def _init_connection(conn: asyncpg.Connection):
+    """Register codecs for pgvector and jsonb on each new pool connection"""
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+    # Supabase installs pgvector into the "extensions" schema, plain Postgres into "public"
+    for schema in ("extensions", "public"):
+        try:
+            await conn.set_type_codec(
+                "vector", encoder=_encode_vector, decoder=_decode_vector, schema=schema, format="text"
+            )
+            break
+        except ValueError:
+            continue
+
+# Seconds a replica is behind the primary; 0 when it has replayed all received WAL
+# (an idle primary would otherwise make pg_last_xact_replay_timestamp() look stale)
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+END AS lag_seconds,
+CASE
+    WHEN NOT pg_is_in_recovery() THEN pg_current_wal_lsn()
+    ELSE pg_last_wal_replay_lsn()
+END - '0/0'::pg_lsn AS replay_lsn
+"""
+
+class ReplicaPool:
+    """A read replica's pool with its last measured replication lag"""
+
+    def __init__(self, dsn: str, pool: asyncpg.Pool):
+        self.dsn = dsn
+        self.pool = pool
+        self.lag_seconds: Optional[float] = None
+        # WAL byte position replayed as of the last lag check
+        self.replay_lsn: Optional[int] = None
+
+    @property
+    def in_use(self) -> int:
+        return self.pool.get_size() - self.pool.get_idle_size()
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= settings.db_replica_max_lag_seconds
+
 class SupabaseClient:
     def __init__(self):
         self.url = settings.supabase_url
         self.anon_key = settings.supabase_anon_key
         self.service_role_key = settings.supabase_service_role_key
         self.client: Client = create_client(self.url, self.anon_key)
+        # Read-only REST traffic that tolerates staleness (report data, the agent catalog); the primary
+        # unless a replica endpoint is set. Its lag is not bounded, so reads that follow the caller's
+        # own writes, like the list routes, stay on `client`
+        self.read_client: Client = (
+            create_client(settings.supabase_read_url, self.anon_key) if settings.supabase_read_url else self.client
+        )
         self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+        self._replicas: List[ReplicaPool] = []
+        self._replica_cursor = 0
+        self._lag_checked_at = 0.0
+        self._lag_check: Optional[asyncio.Task] = None
+
+    async def init_pool(self) -> asyncpg.Pool:
+        """Create the asyncpg pool exactly once, even under concurrent callers"""
+        if self._pool is not None:
+            return self._pool
+
+        async with self._pool_lock:
+            if self._pool is None:
+                if not settings.database_url:
+                    raise RuntimeError("DATABASE_URL is not configured")
+
+                self._pool = await self._create_pool(settings.database_url)
+                logger.info(
+                    "Database pool initialized",
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                    statement_cache_size=settings.db_statement_cache_size
+                )
+                await self._init_replicas()
+
+        return self._pool
+
+    async def _create_pool(self, dsn: str) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            dsn,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            statement_cache_size=settings.db_statement_cache_size,
+            command_timeout=settings.db_command_timeout_seconds,
+            max_inactive_connection_lifetime=settings.db_max_inactive_connection_lifetime,
+            init=_init_connection
+        )
+
+    async def _init_replicas(self):
+        """Open a pool per configured replica; an unreachable replica is skipped"""
+        dsns = [dsn.strip() for dsn in (settings.database_replica_urls or "").split(",") if dsn.strip()]
+        for dsn in dsns:
+            try:
+                self._replicas.append(ReplicaPool(dsn, await self._create_pool(dsn)))
+            except Exception as e:
+                logger.error("Error connecting to read replica", error=str(e))
+
+        if self._replicas:
+            await self._check_replica_lag()
+            logger.info(
+                "Read replica pools initialized",
+                replicas=len(self._replicas),
+                healthy=sum(replica.healthy for replica in self._replicas)
+            )
 
     async def get_pool(self) -> asyncpg.Pool:
         """Get asyncpg connection pool for vector operations"""
         if self._pool is None:
-            self._pool = await asyncpg.create_pool(
-                settings.supabase_url.replace("https://", "postgresql://").replace("http://", "postgresql://") +
-                "?sslmode=require",
-                user=self.service_role_key,
-                password=self.service_role_key,
-                database="postgres"
-            )
+            # Normally created at startup; initialize lazily if startup could not
+            return await self.init_pool()
         return self._pool
 
+    async def get_read_pool(self, min_lsn: Optional[int] = None) -> asyncpg.Pool:
+        """Pool for read-only queries that tolerate replica lag.
+
+        Picks among replicas within DB_REPLICA_MAX_LAG_SECONDS, round-robin or
+        least busy per DB_REPLICA_SELECTION, and falls back to the primary when
+        no replica qualifies. With `min_lsn`, only replicas that had replayed at
+        least that WAL position at the last lag check qualify. Writes and
+        read-your-writes paths use get_pool().
+        """
+        primary = await self.get_pool()
+        if not self._replicas:
+            return primary
+
+        self._schedule_lag_check()
+        healthy = [
+            replica for replica in self._replicas
+            if replica.healthy and (min_lsn is None or (replica.replay_lsn or 0) >= min_lsn)
+        ]
+        if not healthy:
+            metrics.incr("db.replica.fallbacks")
+            return primary
+
+        self._replica_cursor += 1
+        if settings.db_replica_selection == "round_robin":
+            return healthy[self._replica_cursor % len(healthy)].pool
+
+        # Least busy; rotate the starting point so idle replicas share load evenly
+        start = self._replica_cursor % len(healthy)
+        rotated = healthy[start:] + healthy[:start]
+        return min(rotated, key=lambda replica: replica.in_use).pool
+
+    def _schedule_lag_check(self):
+        """Re-measure replica lag in the background once the last check is stale"""
+        if self._lag_check is not None and not self._lag_check.done():
+            return
+        if time.monotonic() - self._lag_checked_at < settings.db_replica_lag_check_interval_seconds:
+            return
+        self._lag_check = asyncio.create_task(self._check_replica_lag())
+
+    async def _check_replica_lag(self):
+        self._lag_checked_at = time.monotonic()
+        for replica in self._replicas:
+            try:
+                async with replica.pool.acquire(timeout=2.0) as conn:
+                    row = await conn.fetchrow(REPLICA_LAG_SQL, timeout=2.0)
+                replica.lag_seconds = float(row["lag_seconds"])
+                replica.replay_lsn = int(row["replay_lsn"]) if row["replay_lsn"] is not None else None
+            except Exception as e:
+                replica.lag_seconds = None
+                replica.replay_lsn = None
+                logger.error("Error checking read replica lag", error=str(e))
+
+    def record_pool_metrics(self) -> None:
+        """Publish pool size and utilisation as gauges"""
+        if self._pool is None:
+            metrics.set_gauge("db.pool.size", 0)
+            return
+
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        max_size = self._pool.get_max_size()
+        metrics.set_gauge("db.pool.size", size)
+        metrics.set_gauge("db.pool.idle", idle)
+        metrics.set_gauge("db.pool.in_use", size - idle)
+        metrics.set_gauge("db.pool.max_size", max_size)
+        metrics.set_gauge("db.pool.utilisation", (size - idle) / max_size if max_size else 0)
+
+        for index, replica in enumerate(self._replicas):
+            metrics.set_gauge(f"db.replica.{index}.in_use", replica.in_use)
+            metrics.set_gauge(f"db.replica.{index}.lag_seconds", replica.lag_seconds if replica.lag_seconds is not None else -1)
+        metrics.set_gauge("db.replica.healthy", sum(replica.healthy for replica in self._replicas))
+
+    async def check_database(self, timeout: float = 2.0) -> bool:
+        """Round-trip a trivial query through the pool"""
+        try:
+            pool = await self.get_pool()
+            async with pool.acquire(timeout=timeout) as conn:
+                await conn.fetchval("SELECT 1", timeout=timeout)
+            return True
+        except Exception as e:
+            logger.error("Error checking database connectivity", error=str(e))
+            return False
+
     async def close(self):
-        """Close the connection pool"""
+        """Close the primary and replica connection pools"""
+        if self._lag_check is not None:
+            self._lag_check.cancel()
+            self._lag_check = None
+        for replica in self._replicas:
+            await replica.pool.close()
+        self._replicas = []
+
         if self._pool:
             await self._pool.close()
+            self._pool = None
+            logger.info("Database pool closed")
 
 supabase_client = SupabaseClient()
@@ -0,0 +1,269 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, Optional
+import asyncpg
+import structlog
+from ..services.supabase_client import supabase_client
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+# One atomic statement for any number of users; increments for the same user are summed
+# first because ON CONFLICT cannot update the same row twice in one statement
+INCREMENT_CHAT_COUNTERS_SQL = """
+INSERT INTO wallet_counters (user_id, chat_inference_counter, updated_at)
+SELECT user_id, sum(amount)::integer, now()
+FROM unnest($1::uuid[], $2::integer[]) AS increments(user_id, amount)
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE
+SET chat_inference_counter = wallet_counters.chat_inference_counter + excluded.chat_inference_counter,
+    updated_at = now()
+"""
+
+REDIS_PENDING_KEY = "usage:chat_inference:pending"
+# Batches being written are renamed to <prefix><uuid> and registered in a sorted set
+# scored by flush start time, so abandoned ones can be found without scanning keys
+REDIS_FLUSHING_PREFIX = f"{REDIS_PENDING_KEY}:flushing:"
+REDIS_FLUSHING_SET = "usage:chat_inference:flushing"
+# Increments the database rejected, per user, for manual follow-up
+REDIS_DEAD_LETTER_KEY = "usage:chat_inference:dead_letter"
+
+# Adds user/amount pairs from ARGV (or, without ARGV, every field of KEYS[1]) to the
+# pending hash KEYS[2], deletes KEYS[1] and unregisters it from KEYS[3], atomically
+MERGE_BACK_SCRIPT = """
+local increments = ARGV
+if #increments == 0 then
+    increments = redis.call('HGETALL', KEYS[1])
+end
+for i = 1, #increments, 2 do
+    redis.call('HINCRBY', KEYS[2], increments[i], increments[i + 1])
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[3], KEYS[1])
+return #increments / 2
+"""
+
+# Rejected for the row itself (e.g. the user was deleted): retrying the same increment cannot succeed
+PERMANENT_ERRORS = (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError)
+
+class UnwrittenIncrements(Exception):
+    """Raised when some increments could not be written and should be retried later"""
+
+    def __init__(self, increments: Dict[str, int], error: Exception):
+        super().__init__(str(error))
+        self.increments = increments
+
+class UsageMeter:
+    """Counts chat inferences per user in wallet_counters without read-modify-write races.
+
+    Unbuffered, each record() is one atomic upsert. Buffered, increments are summed
+    per user in memory (or in a Redis hash shared by all processes) and written as a
+    single upsert every flush interval and on shutdown. A batch the database rejects
+    is retried user by user so one bad row (e.g. a deleted user) cannot hold back
+    everyone else's usage; the rejected increments are logged and dead-lettered.
+    """
+
+    def __init__(
+        self,
+        buffered: bool = True,
+        flush_interval_seconds: float = 5.0,
+        redis_url: Optional[str] = None,
+        stale_flush_seconds: float = 300.0
+    ):
+        self.supabase = supabase_client
+        self.buffered = buffered
+        self.flush_interval_seconds = flush_interval_seconds
+        # A Redis batch still unwritten after this long was abandoned by a failed or dead flush
+        self.stale_flush_seconds = stale_flush_seconds
+        self._redis_url = redis_url
+        self._redis = None
+        self._pending: Dict[str, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def record(self, user_id: str, amount: int = 1):
+        """Count inferences for a user; raises if an unbuffered write fails"""
+        if not self.buffered:
+            await self._apply({user_id: amount})
+            return
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                await redis_client.hincrby(REDIS_PENDING_KEY, user_id, amount)
+                return
+            except Exception as e:
+                logger.warning("Usage meter Redis write failed, buffering locally", error=str(e))
+
+        self._pending[user_id] = self._pending.get(user_id, 0) + amount
+        metrics.set_gauge("usage_meter.pending_users", len(self._pending))
+
+    async def flush(self):
+        """Write buffered increments; failed increments stay buffered for the next flush"""
+        async with self._flush_lock:
+            await self._flush_local()
+            await self._flush_redis()
+
+    def start(self):
+        """Start periodic flushes; call from the running event loop"""
+        if self.buffered and self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop periodic flushes and write whatever is still buffered"""
+        if self._task is not None:
+            # Holding the lock lets an in-flight flush finish instead of being cancelled mid-write
+            async with self._flush_lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Error flushing usage counters", error=str(e))
+
+    async def _flush_local(self):
+        if not self._pending:
+            return
+
+        # Swap first so increments recorded during the write land in the next batch
+        batch, self._pending = self._pending, {}
+        try:
+            await self._write(batch)
+        except UnwrittenIncrements as e:
+            for user_id, amount in e.increments.items():
+                self._pending[user_id] = self._pending.get(user_id, 0) + amount
+            raise
+        finally:
+            metrics.set_gauge("usage_meter.pending_users", len(self._pending))
+
+    async def _flush_redis(self):
+        redis_client = self._get_redis()
+        if redis_client is None:
+            return
+
+        await self._recover_stale_flushes(redis_client)
+
+        # RENAME is atomic: HINCRBYs from any process after this point go to a fresh hash.
+        # If this flush dies before deleting or merging back its key, a later flush recovers it.
+        flushing_key = f"{REDIS_FLUSHING_PREFIX}{uuid.uuid4()}"
+        await redis_client.zadd(REDIS_FLUSHING_SET, {flushing_key: time.time()})
+        try:
+            await redis_client.rename(REDIS_PENDING_KEY, flushing_key)
+        except Exception as e:
+            await redis_client.zrem(REDIS_FLUSHING_SET, flushing_key)
+            if "no such key" not in str(e).lower():
+                logger.warning("Usage meter Redis flush failed", error=str(e))
+            return
+
+        raw = await redis_client.hgetall(flushing_key)
+        batch = {
+            (key.decode() if isinstance(key, bytes) else key): int(value)
+            for key, value in raw.items()
+        }
+        try:
+            await self._write(batch)
+        except UnwrittenIncrements as e:
+            # Hand the unwritten increments back so a later flush retries them
+            pairs = [str(item) for user_amount in e.increments.items() for item in user_amount]
+            await redis_client.eval(MERGE_BACK_SCRIPT, 3, flushing_key, REDIS_PENDING_KEY, REDIS_FLUSHING_SET, *pairs)
+            raise
+        await redis_client.delete(flushing_key)
+        await redis_client.zrem(REDIS_FLUSHING_SET, flushing_key)
+
+    async def _recover_stale_flushes(self, redis_client):
+        """Merge batches left by flushes that failed or died after RENAME back into the pending hash"""
+        # Younger batches may still be in use by a flush in another process
+        stale = await redis_client.zrangebyscore(REDIS_FLUSHING_SET, "-inf", time.time() - self.stale_flush_seconds)
+        for key in stale:
+            key = key.decode() if isinstance(key, bytes) else key
+            users = await redis_client.eval(MERGE_BACK_SCRIPT, 3, key, REDIS_PENDING_KEY, REDIS_FLUSHING_SET)
+            if users:
+                metrics.incr("usage_meter.recovered_batches")
+                logger.warning("Recovered abandoned usage counter batch", key=key, users=users)
+
+    async def _write(self, increments: Dict[str, int]):
+        """Write a batch, isolating rows the database rejects; raises UnwrittenIncrements for the rest"""
+        try:
+            await self._apply(increments)
+            return
+        except PERMANENT_ERRORS as e:
+            logger.warning("Usage counter batch rejected, retrying per user", users=len(increments), error=str(e))
+        except Exception as e:
+            raise UnwrittenIncrements(increments, e) from e
+
+        unwritten: Dict[str, int] = {}
+        last_error: Optional[Exception] = None
+        for user_id, amount in increments.items():
+            try:
+                await self._apply({user_id: amount})
+            except PERMANENT_ERRORS as e:
+                await self._dead_letter(user_id, amount, e)
+            except Exception as e:
+                unwritten[user_id] = amount
+                last_error = e
+
+        if unwritten:
+            raise UnwrittenIncrements(unwritten, last_error)
+
+    async def _dead_letter(self, user_id: str, amount: int, error: Exception):
+        """Drop an increment the database will never accept, keeping a record of it"""
+        metrics.incr("usage_meter.dead_lettered", amount)
+        logger.error("Dropping usage increment rejected by the database", user_id=user_id, amount=amount, error=str(error))
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                await redis_client.hincrby(REDIS_DEAD_LETTER_KEY, user_id, amount)
+            except Exception as e:
+                logger.warning("Usage meter dead-letter write failed", error=str(e))
+
+    async def _apply(self, increments: Dict[str, int]):
+        """Add increments to wallet_counters in one atomic upsert"""
+        increments = {user_id: amount for user_id, amount in increments.items() if amount}
+        if not increments:
+            return
+
+        pool = await self.supabase.get_pool()
+        async with pool.acquire() as conn:
+            await conn.execute(INCREMENT_CHAT_COUNTERS_SQL, list(increments), list(increments.values()))
+
+        metrics.incr("usage_meter.flushes")
+        metrics.incr("usage_meter.increments", sum(increments.values()))
+
+    def _get_redis(self):
+        """Lazily create the Redis client when a shared buffer is configured"""
+        if not self._redis_url:
+            return None
+
+        if self._redis is None:
+            try:
+                import redis.asyncio as redis
+                self._redis = redis.from_url(self._redis_url)
+            except Exception as e:
+                logger.warning("Usage meter Redis unavailable", error=str(e))
+                self._redis_url = None
+                return None
+
+        return self._redis
+
+# Global usage meter instance
+usage_meter: Optional[UsageMeter] = None
+
+def get_usage_meter() -> UsageMeter:
+    """Get or create usage meter instance"""
+    global usage_meter
+    if usage_meter is None:
+        usage_meter = UsageMeter(
+            buffered=settings.usage_meter_buffered,
+            flush_interval_seconds=settings.usage_meter_flush_interval_seconds,
+            redis_url=settings.redis_url if settings.usage_meter_use_redis else None
+        )
+    return usage_meter
@@ -0,0 +1,369 @@
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import structlog
+import numpy as np
+from ..services.supabase_client import supabase_client
+from ..services.vector_snapshots import VectorSnapshotStore, VectorSnapshot
+from ..services.index_versions import get_index_version_tracker
+from ..core.cache import TTLLRUCache
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+# Above this many rows the dot product runs in a worker thread instead of on the event loop
+_THREADED_SEARCH_MIN_ROWS = 5000
+
+class WorkbenchVectors:
+    """Embeddings and row data for one workbench, held as a contiguous float32 matrix
+
+    Entries opened from an on-disk snapshot have a memory-mapped matrix and no
+    contents; chunk text for the hits is then fetched by id at query time.
+    """
+
+    def __init__(
+        self,
+        workbench_id: str,
+        index_version: int,
+        ids: List[str],
+        file_ids: List[str],
+        contents: Optional[List[str]],
+        metadata: List[Dict[str, Any]],
+        matrix: np.ndarray,
+        last_seq: int
+    ):
+        self.workbench_id = workbench_id
+        self.index_version = index_version
+        self.ids = ids
+        self.file_ids = file_ids
+        self.contents = contents
+        self.metadata = metadata
+        self.matrix = matrix
+        self.last_seq = last_seq
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + sum(len(content) for content in self.contents or ())
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so cosine similarity becomes a dot product"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k_similar(matrix: np.ndarray, query: np.ndarray, limit: int, threshold: float) -> List[tuple]:
+    """Return (row, similarity) pairs for the best rows above threshold, best first"""
+    if matrix.shape[0] == 0 or limit <= 0:
+        return []
+
+    similarities = matrix @ query
+    candidates = np.flatnonzero(similarities > threshold)
+    if candidates.size == 0:
+        return []
+
+    if candidates.size > limit:
+        top = np.argpartition(similarities[candidates], -limit)[-limit:]
+        candidates = candidates[top]
+
+    order = np.argsort(similarities[candidates])[::-1]
+    return [(int(row), float(similarities[row])) for row in candidates[order]]
+
+class InMemoryVectorIndex:
+    """In-process vector index for small, hot workbenches with LRU eviction under a memory cap"""
+
+    def __init__(
+        self,
+        max_chunks: int = 50000,
+        memory_limit_bytes: int = 1024 * 1024 * 1024,
+        snapshots: Optional[VectorSnapshotStore] = None
+    ):
+        self.supabase = supabase_client
+        self.index_versions = get_index_version_tracker()
+        self.snapshots = snapshots
+        self.max_chunks = max_chunks
+        self.memory_limit_bytes = memory_limit_bytes
+        self._entries: "OrderedDict[str, WorkbenchVectors]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        # (workbench_id, index_version) pairs known to be too large to hold in memory
+        self._oversized = TTLLRUCache(10000, 3600)
+
+    async def search(
+        self,
+        workbench_id: str,
+        index_version: int,
+        query_embedding: List[float],
+        limit: int,
+        threshold: float,
+        include_embeddings: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Search a loaded workbench; returns None when the caller should fall back to pgvector"""
+        entry = self._entries.get(workbench_id)
+
+        # A fresh worker can serve straight from an on-disk snapshot of this version
+        if entry is None and self.snapshots is not None and workbench_id not in self._loading:
+            entry = await self._open_snapshot(workbench_id, index_version)
+
+        if entry is None or entry.index_version != index_version:
+            # Cold or stale: load in the background and let pgvector serve this request
+            self._schedule_load(workbench_id, index_version)
+            metrics.incr("vector_index.fallbacks")
+            return None
+
+        self._entries.move_to_end(workbench_id)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+        query = query / query_norm
+
+        if entry.size >= _THREADED_SEARCH_MIN_ROWS:
+            hits = await asyncio.to_thread(top_k_similar, entry.matrix, query, limit, threshold)
+        else:
+            hits = top_k_similar(entry.matrix, query, limit, threshold)
+
+        if entry.contents is not None:
+            contents = [entry.contents[row] for row, _ in hits]
+        else:
+            contents = await self._fetch_contents(workbench_id, [entry.ids[row] for row, _ in hits])
+
+        metrics.incr("vector_index.hits")
+        results = []
+        for (row, similarity), content in zip(hits, contents):
+            result = {
+                "id": entry.ids[row],
+                "workbench_id": workbench_id,
+                "file_id": entry.file_ids[row],
+                "content": content,
+                "metadata": entry.metadata[row],
+                "similarity": similarity
+            }
+            if include_embeddings:
+                result["embedding"] = np.asarray(entry.matrix[row])
+            results.append(result)
+        return results
+
+    def invalidate(self, workbench_id: str):
+        """Drop a workbench from memory"""
+        self._entries.pop(workbench_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return loaded workbenches and memory usage"""
+        return {
+            "workbenches": len(self._entries),
+            "chunks": sum(entry.size for entry in self._entries.values()),
+            "bytes": sum(entry.nbytes for entry in self._entries.values()),
+            "memory_limit_bytes": self.memory_limit_bytes
+        }
+
+    def _schedule_load(self, workbench_id: str, index_version: int):
+        """Start a background load unless one is running or the workbench is too large"""
+        if workbench_id in self._loading or self._oversized.get((workbench_id, index_version)):
+            return
+
+        task = asyncio.create_task(self._load(workbench_id, index_version))
+        self._loading[workbench_id] = task
+        task.add_done_callback(lambda _: self._loading.pop(workbench_id, None))
+
+    async def _load(self, workbench_id: str, index_version: int):
+        """Load or incrementally refresh a workbench's embeddings"""
+        try:
+            pool = await self.supabase.get_pool()
+            async with pool.acquire() as conn:
+                total = await conn.fetchval(
+                    "SELECT count(*) FROM workbench_chunks WHERE workbench_id = $1 AND embedding IS NOT NULL",
+                    workbench_id
+                )
+
+                if total > self.max_chunks:
+                    self._oversized.set((workbench_id, index_version), True)
+                    self.invalidate(workbench_id)
+                    logger.info("Workbench too large for in-memory index", workbench_id=workbench_id, chunks=total)
+                    return
+
+                previous = self._entries.get(workbench_id)
+                if previous is None and self.snapshots is not None:
+                    snapshot = await asyncio.to_thread(self.snapshots.load_latest, workbench_id, index_version)
+                    if snapshot is not None:
+                        previous = self._entry_from_snapshot(workbench_id, snapshot)
+
+                after_seq = previous.last_seq if previous is not None else -1
+                rows = await conn.fetch(
+                    """
+                    SELECT id, file_id, content, metadata, embedding, chunk_seq
+                    FROM workbench_chunks
+                    WHERE workbench_id = $1 AND chunk_seq > $2 AND embedding IS NOT NULL
+                    ORDER BY chunk_seq
+                    """,
+                    workbench_id,
+                    after_seq
+                )
+
+                # Chunks were deleted since the last load, so appending is not enough
+                if previous is not None and previous.size + len(rows) != total:
+                    previous = None
+                    rows = await conn.fetch(
+                        """
+                        SELECT id, file_id, content, metadata, embedding, chunk_seq
+                        FROM workbench_chunks
+                        WHERE workbench_id = $1 AND embedding IS NOT NULL
+                        ORDER BY chunk_seq
+                        """,
+                        workbench_id
+                    )
+
+            entry = self._build_entry(workbench_id, index_version, previous, rows)
+            if self.snapshots is not None and (rows or previous is None or previous.index_version != index_version):
+                entry = await asyncio.to_thread(self._write_snapshot, entry)
+            self._store(entry)
+            logger.info(
+                "Loaded workbench into in-memory index",
+                workbench_id=workbench_id,
+                index_version=index_version,
+                chunks=entry.size,
+                incremental=previous is not None
+            )
+
+        except Exception as e:
+            logger.error("Error loading in-memory vector index", workbench_id=workbench_id, error=str(e))
+
+    def _build_entry(
+        self,
+        workbench_id: str,
+        index_version: int,
+        previous: Optional[WorkbenchVectors],
+        rows: List[Any]
+    ) -> WorkbenchVectors:
+        """Append fetched rows to the previous entry (if any) as a new contiguous matrix"""
+        ids = list(previous.ids) if previous else []
+        file_ids = list(previous.file_ids) if previous else []
+        # Snapshot-backed entries keep no chunk text; it is fetched per query instead
+        if previous is None:
+            contents = []
+        elif previous.contents is None:
+            contents = None
+        else:
+            contents = list(previous.contents)
+        metadata = list(previous.metadata) if previous else []
+        last_seq = previous.last_seq if previous else -1
+
+        for row in rows:
+            ids.append(str(row["id"]))
+            file_ids.append(str(row["file_id"]))
+            if contents is not None:
+                contents.append(row["content"])
+            metadata.append(row["metadata"] or {})
+            last_seq = max(last_seq, row["chunk_seq"])
+
+        if rows:
+            new_matrix = normalize_rows(np.stack([row["embedding"] for row in rows]))
+            matrix = np.concatenate([previous.matrix, new_matrix]) if previous and previous.size else new_matrix
+        else:
+            matrix = previous.matrix if previous else np.empty((0, 0), dtype=np.float32)
+
+        return WorkbenchVectors(
+            workbench_id, index_version, ids, file_ids, contents, metadata, matrix, last_seq
+        )
+
+    async def _open_snapshot(self, workbench_id: str, index_version: int) -> Optional[WorkbenchVectors]:
+        """Memory-map the newest on-disk snapshot; older versions are refreshed incrementally"""
+        try:
+            snapshot = await asyncio.to_thread(self.snapshots.load_latest, workbench_id, index_version)
+        except Exception as e:
+            logger.warning("Error opening vector snapshot", workbench_id=workbench_id, error=str(e))
+            return None
+
+        if snapshot is None:
+            return None
+
+        entry = self._entry_from_snapshot(workbench_id, snapshot)
+        self._store(entry)
+        metrics.incr("vector_index.snapshot_loads")
+        return entry
+
+    def _entry_from_snapshot(self, workbench_id: str, snapshot: VectorSnapshot) -> WorkbenchVectors:
+        return WorkbenchVectors(
+            workbench_id,
+            snapshot.index_version,
+            snapshot.ids,
+            snapshot.file_ids,
+            None,
+            snapshot.metadata,
+            snapshot.matrix,
+            snapshot.last_seq
+        )
+
+    def _write_snapshot(self, entry: WorkbenchVectors) -> WorkbenchVectors:
+        """Persist an entry and swap its matrix for the shared memory map"""
+        try:
+            snapshot = self.snapshots.save(
+                entry.workbench_id,
+                entry.index_version,
+                entry.last_seq,
+                entry.matrix,
+                entry.ids,
+                entry.file_ids,
+                entry.metadata
+            )
+            entry.matrix = snapshot.matrix
+        except Exception as e:
+            logger.warning("Error writing vector snapshot", workbench_id=entry.workbench_id, error=str(e))
+        return entry
+
+    async def _fetch_contents(self, workbench_id: str, chunk_ids: List[str]) -> List[str]:
+        """Fetch chunk text for snapshot-backed hits, preserving order"""
+        if not chunk_ids:
+            return []
+
+        # A lagging replica may not have the chunks this entry was loaded with yet
+        pool = await self.index_versions.get_read_pool(workbench_id)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, content FROM workbench_chunks WHERE workbench_id = $1 AND id = ANY($2::uuid[])",
+                workbench_id,
+                chunk_ids
+            )
+
+        by_id = {str(row["id"]): row["content"] for row in rows}
+        return [by_id.get(chunk_id, "") for chunk_id in chunk_ids]
+
+    def _store(self, entry: WorkbenchVectors):
+        """Insert an entry and evict least recently used workbenches over the memory cap"""
+        if entry.nbytes > self.memory_limit_bytes:
+            self._oversized.set((entry.workbench_id, entry.index_version), True)
+            self.invalidate(entry.workbench_id)
+            return
+
+        self._entries[entry.workbench_id] = entry
+        self._entries.move_to_end(entry.workbench_id)
+
+        used = sum(item.nbytes for item in self._entries.values())
+        while used > self.memory_limit_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            used -= evicted.nbytes
+            metrics.incr("vector_index.evictions")
+            logger.info("Evicted workbench from in-memory index", workbench_id=evicted.workbench_id)
+
+        metrics.set_gauge("vector_index.bytes", used)
+        metrics.set_gauge("vector_index.workbenches", len(self._entries))
+
+# Global in-memory vector index instance
+vector_index: Optional[InMemoryVectorIndex] = None
+
+def get_vector_index() -> InMemoryVectorIndex:
+    """Get or create in-memory vector index instance"""
+    global vector_index
+    if vector_index is None:
+        snapshots = VectorSnapshotStore(settings.vector_snapshot_dir) if settings.vector_snapshot_dir else None
+        vector_index = InMemoryVectorIndex(
+            max_chunks=settings.vector_index_max_chunks,
+            memory_limit_bytes=settings.vector_index_memory_mb * 1024 * 1024,
+            snapshots=snapshots
+        )
+    return vector_index
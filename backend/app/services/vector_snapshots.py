@@ -0,0 +1,137 @@
+import json
+import os
+import re
+from typing import Optional, List, Dict, Any
+import structlog
+import numpy as np
+
+logger = structlog.get_logger()
+
+SNAPSHOT_FORMAT = 1
+
+_SIDECAR_PATTERN = re.compile(r"^v(\d+)\.json$")
+
+class VectorSnapshot:
+    """A memory-mapped embedding matrix plus its id/offset sidecar"""
+
+    def __init__(self, index_version: int, last_seq: int, matrix: np.ndarray, ids: List[str], file_ids: List[str], metadata: List[Dict[str, Any]]):
+        self.index_version = index_version
+        self.last_seq = last_seq
+        self.matrix = matrix
+        self.ids = ids
+        self.file_ids = file_ids
+        self.metadata = metadata
+
+class VectorSnapshotStore:
+    """On-disk per-workbench embedding snapshots, one pair of files per index version
+
+    Layout under the base directory:
+        <workbench_id>/v<index_version>.npy   normalized float32 matrix, one row per chunk
+        <workbench_id>/v<index_version>.json  sidecar; row offset i belongs to ids[i]
+
+    The sidecar is written last, so a snapshot only exists once both files are complete.
+    """
+
+    def __init__(self, base_dir: str, keep_versions: int = 2):
+        self.base_dir = base_dir
+        self.keep_versions = keep_versions
+
+    def load_latest(self, workbench_id: str, max_version: int) -> Optional[VectorSnapshot]:
+        """Open the newest snapshot not newer than max_version, memory-mapping its matrix"""
+        versions = [version for version in self._versions(workbench_id) if version <= max_version]
+        for version in sorted(versions, reverse=True):
+            try:
+                return self._open(workbench_id, version)
+            except Exception as e:
+                logger.warning("Skipping unreadable vector snapshot", workbench_id=workbench_id, index_version=version, error=str(e))
+        return None
+
+    def save(
+        self,
+        workbench_id: str,
+        index_version: int,
+        last_seq: int,
+        matrix: np.ndarray,
+        ids: List[str],
+        file_ids: List[str],
+        metadata: List[Dict[str, Any]]
+    ) -> VectorSnapshot:
+        """Write a snapshot atomically and return it re-opened as a memory map"""
+        directory = self._directory(workbench_id)
+        os.makedirs(directory, exist_ok=True)
+
+        matrix_path = os.path.join(directory, f"v{index_version}.npy")
+        sidecar_path = os.path.join(directory, f"v{index_version}.json")
+
+        tmp_matrix_path = f"{matrix_path}.{os.getpid()}.tmp"
+        with open(tmp_matrix_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        os.replace(tmp_matrix_path, matrix_path)
+
+        sidecar = {
+            "format": SNAPSHOT_FORMAT,
+            "workbench_id": workbench_id,
+            "index_version": index_version,
+            "last_seq": last_seq,
+            "rows": len(ids),
+            "ids": ids,
+            "file_ids": file_ids,
+            "metadata": metadata
+        }
+        tmp_sidecar_path = f"{sidecar_path}.{os.getpid()}.tmp"
+        with open(tmp_sidecar_path, "w") as f:
+            json.dump(sidecar, f)
+        os.replace(tmp_sidecar_path, sidecar_path)
+
+        self._prune(workbench_id)
+        logger.info("Wrote vector snapshot", workbench_id=workbench_id, index_version=index_version, rows=len(ids))
+        return self._open(workbench_id, index_version)
+
+    def _open(self, workbench_id: str, index_version: int) -> VectorSnapshot:
+        directory = self._directory(workbench_id)
+
+        with open(os.path.join(directory, f"v{index_version}.json")) as f:
+            sidecar = json.load(f)
+
+        if sidecar.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {sidecar.get('format')}")
+
+        # np.load with mmap_mode returns a read-only numpy.memmap, so sibling
+        # processes share the same pages through the OS page cache
+        matrix = np.load(os.path.join(directory, f"v{index_version}.npy"), mmap_mode="r")
+
+        if matrix.shape[0] != sidecar["rows"]:
+            raise ValueError("Snapshot matrix and sidecar row counts differ")
+
+        return VectorSnapshot(
+            index_version=sidecar["index_version"],
+            last_seq=sidecar["last_seq"],
+            matrix=matrix,
+            ids=sidecar["ids"],
+            file_ids=sidecar["file_ids"],
+            metadata=sidecar["metadata"]
+        )
+
+    def _prune(self, workbench_id: str):
+        """Remove all but the newest keep_versions snapshots"""
+        directory = self._directory(workbench_id)
+        for version in sorted(self._versions(workbench_id), reverse=True)[self.keep_versions:]:
+            for suffix in ("json", "npy"):
+                try:
+                    os.remove(os.path.join(directory, f"v{version}.{suffix}"))
+                except FileNotFoundError:
+                    pass
+
+    def _versions(self, workbench_id: str) -> List[int]:
+        try:
+            names = os.listdir(self._directory(workbench_id))
+        except FileNotFoundError:
+            return []
+
+        return [int(match.group(1)) for match in map(_SIDECAR_PATTERN.match, names) if match]
+
+    def _directory(self, workbench_id: str) -> str:
+        # Workbench ids are UUIDs; reject anything that could escape the base directory
+        if not re.fullmatch(r"[0-9a-fA-F-]+", workbench_id):
+            raise ValueError(f"Invalid workbench id: {workbench_id}")
+        return os.path.join(self.base_dir, workbench_id)
@@ -0,0 +1,109 @@
+import asyncio
+import zlib
+from typing import Awaitable, Callable, List, Optional
+import structlog
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+WriteJob = Callable[[], Awaitable[None]]
+
+class WriteBehindQueue:
+    """Background writes that do not block the response.
+
+    Jobs are sharded by key over a fixed set of workers, so writes for one key
+    (e.g. a chat session) run in submission order while different keys proceed
+    in parallel. Failed jobs are retried with backoff; remaining jobs are drained
+    on shutdown.
+    """
+
+    def __init__(self, workers: int = 4, max_size: int = 10000, max_attempts: int = 3, retry_base_seconds: float = 0.2):
+        self.workers = workers
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = False
+
+    def start(self):
+        """Start the worker tasks; call from the running event loop"""
+        if self._tasks:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.max_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+        self._accepting = True
+        logger.info("Write-behind queue started", workers=self.workers)
+
+    async def submit(self, key: str, name: str, job: WriteJob):
+        """Queue a write; runs it inline when the queue is not running"""
+        if not self._accepting:
+            await self._run(name, job)
+            return
+
+        queue = self._queues[zlib.crc32(key.encode()) % len(self._queues)]
+        if queue.full():
+            # Backpressure instead of dropping writes
+            metrics.incr("write_behind.full")
+        await queue.put((name, job))
+        metrics.set_gauge("write_behind.pending", self.pending)
+
+    @property
+    def pending(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def drain(self, timeout: float = 10.0):
+        """Stop accepting writes, finish queued ones within the timeout, then stop workers"""
+        if not self._tasks:
+            return
+
+        self._accepting = False
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            metrics.incr("write_behind.dropped", self.pending)
+            logger.error("Write-behind drain timed out", pending=self.pending)
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+        logger.info("Write-behind queue drained")
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            name, job = await queue.get()
+            try:
+                await self._run(name, job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, name: str, job: WriteJob):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await job()
+                metrics.incr("write_behind.completed")
+                return
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    metrics.incr("write_behind.failed")
+                    logger.error("Error in write-behind job", job=name, attempts=attempt, error=str(e))
+                    return
+                metrics.incr("write_behind.retries")
+                await asyncio.sleep(self.retry_base_seconds * 2 ** (attempt - 1))
+
+# Global write-behind queue instance
+write_behind: Optional[WriteBehindQueue] = None
+
+def get_write_behind() -> WriteBehindQueue:
+    """Get or create write-behind queue instance"""
+    global write_behind
+    if write_behind is None:
+        write_behind = WriteBehindQueue(
+            workers=settings.write_behind_workers,
+            max_size=settings.write_behind_queue_size,
+            max_attempts=settings.write_behind_max_attempts
+        )
+    return write_behind
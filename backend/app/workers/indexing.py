@@ -1,17 +1,25 @@
 import asyncio
 from typing import Dict, Any, Optional
 import structlog
-from .supabase_client import supabase_client
-from .storage_service import get_storage_service
+from ..services.supabase_client import supabase_client
+from ..services.storage_service import get_storage_service
+from ..services.index_versions import get_index_version_tracker
+from ..services.bm25_index import get_bm25_index
+from ..core.config import settings
 
 logger = structlog.get_logger()
 
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
 class IndexingWorker:
     """Background worker for processing uploaded files"""
 
     def __init__(self):
         self.supabase = supabase_client
         self.storage = get_storage_service()
+        self.index_versions = get_index_version_tracker()
+        self.bm25_index = get_bm25_index()
 
     async def process_file(self, file_id: str, workbench_id: str) -> bool:
         """Process an uploaded file: download, chunk, embed, and store"""
@@ -51,8 +59,12 @@ class IndexingWorker:
             # Generate embeddings for chunks
             embeddings = await self._generate_embeddings(chunks)
 
-            # Store chunks with embeddings
-            await self._store_chunks(workbench_id, file_id, chunks, embeddings)
+            # Store chunks with embeddings; this also invalidates cached retrieval results for the workbench
+            index_version = await self._store_chunks(workbench_id, file_id, chunks, embeddings)
+
+            # Append the new chunks to this process's keyword index (other workers catch up by chunk_seq)
+            if settings.bm25_index_enabled and index_version is not None:
+                await self.bm25_index.refresh(workbench_id, index_version)
 
             # Update file status to indexed
             await self._update_file_status(file_id, "indexed")
@@ -116,7 +128,7 @@ class IndexingWorker:
             logger.error("Error extracting text", file_type=file_type, error=str(e))
             return None
 
-    async def _chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> list[str]:
+    async def _chunk_text(self, text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
         """Split text into chunks"""
         try:
             words = text.split()
@@ -147,10 +159,12 @@ class IndexingWorker:
             logger.error("Error generating embeddings", error=str(e))
             return []
 
-    async def _store_chunks(self, workbench_id: str, file_id: str, chunks: list[str], embeddings: list[list[float]]):
-        """Store chunks with embeddings in the database"""
+    async def _store_chunks(self, workbench_id: str, file_id: str, chunks: list[str], embeddings: list[list[float]]) -> Optional[int]:
+        """Store chunks with embeddings in the database and return the bumped index version"""
+        inserted = 0
         try:
             chunk_data = []
+            chunk_step = CHUNK_SIZE - CHUNK_OVERLAP
 
             for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
                 chunk_data.append({
@@ -158,7 +172,13 @@ class IndexingWorker:
                     "file_id": file_id,
                     "chunk_id": f"{file_id}_{i}",
                     "content": chunk,
-                    "metadata": {"chunk_index": i, "total_chunks": len(chunks)},
+                    # Word offsets let the context packer merge overlapping windows
+                    "metadata": {
+                        "chunk_index": i,
+                        "total_chunks": len(chunks),
+                        "word_start": i * chunk_step,
+                        "word_count": len(chunk.split())
+                    },
                     "embedding": embedding
                 })
 
@@ -170,13 +190,28 @@ class IndexingWorker:
 
                 if not result.data:
                     raise Exception(f"Failed to insert chunk batch {i//batch_size}")
+                inserted += len(batch)
 
             logger.info("Stored chunks", chunks_count=len(chunks))
 
         except Exception as e:
-            logger.error("Error storing chunks", error=str(e))
+            logger.error("Error storing chunks", error=str(e), inserted=inserted)
             raise
 
+        finally:
+            # Batches inserted before a failure are already searchable, so cached results are stale either way
+            index_version = await self._bump_index_version(workbench_id) if inserted else None
+
+        return index_version
+
+    async def _bump_index_version(self, workbench_id: str) -> Optional[int]:
+        """Bump the workbench index version after its chunks change"""
+        try:
+            return await self.index_versions.bump(workbench_id)
+        except Exception as e:
+            logger.error("Error bumping index version", workbench_id=workbench_id, error=str(e))
+            return None
+
     async def _update_file_status(self, file_id: str, status: str, error_message: Optional[str] = None):
         """Update file processing status"""
         try:
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Optional
+import structlog
+from ..services.supabase_client import supabase_client
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = structlog.get_logger()
+
+# Any constant works; it only keeps several app processes from sweeping at once
+SWEEP_LOCK_ID = 8008
+
+class PartitionMaintenance:
+    """Detaches and drops the workbench_chunks partitions of deleted workbenches.
+
+    Chunks have no foreign key to their workbench (migration 008), so deleting one
+    leaves its partition and rows in place. Detaching the orphaned partition with
+    DETACH PARTITION ... CONCURRENTLY keeps the parent readable and writable; it
+    cannot run inside a transaction, so each statement goes out on its own over the
+    direct Postgres connection, which must belong to the table owner.
+    """
+
+    def __init__(self, interval_seconds: float = 3600.0):
+        self.supabase = supabase_client
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        """Detach and drop orphaned partitions; returns how many were dropped"""
+        dropped = 0
+        pool = await self.supabase.get_pool()
+        async with pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", SWEEP_LOCK_ID):
+                return 0
+            try:
+                rows = await conn.fetch("SELECT partition_name, detach_pending FROM orphaned_workbench_chunks_partitions()")
+                for row in rows:
+                    name = row["partition_name"]
+                    try:
+                        # An interrupted concurrent detach has to be finalized instead of restarted
+                        mode = "FINALIZE" if row["detach_pending"] else "CONCURRENTLY"
+                        await conn.execute(f'ALTER TABLE workbench_chunks DETACH PARTITION "{name}" {mode}')
+                        await conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+                        dropped += 1
+                    except Exception as e:
+                        logger.error("Error dropping workbench chunks partition", partition=name, error=str(e))
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", SWEEP_LOCK_ID)
+
+        if dropped:
+            metrics.incr("partition_maintenance.dropped", dropped)
+            logger.info("Dropped orphaned workbench chunks partitions", count=dropped)
+        return dropped
+
+    def start(self):
+        """Start periodic sweeps; call from the running event loop"""
+        if self.interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error("Error sweeping workbench chunks partitions", error=str(e))
+
+# Global partition maintenance instance
+partition_maintenance: Optional[PartitionMaintenance] = None
+
+def get_partition_maintenance() -> PartitionMaintenance:
+    """Get or create partition maintenance instance"""
+    global partition_maintenance
+    if partition_maintenance is None:
+        partition_maintenance = PartitionMaintenance(
+            interval_seconds=settings.partition_maintenance_interval_seconds
+        )
+    return partition_maintenance
+
+if __name__ == "__main__":
+    # One-off sweep, e.g. from cron: python -m app.workers.partition_maintenance
+    async def _main():
+        try:
+            await get_partition_maintenance().sweep()
+        finally:
+            await supabase_client.close()
+
+    asyncio.run(_main())
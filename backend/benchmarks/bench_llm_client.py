@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+LLM client benchmark: time-to-first-token, total latency and throughput of
+app.services.llm_client against the local stub server, comparing one shared
+pooled client with a new client per request.
+
+Starts benchmarks/llm_stub_server.py on a free port unless --base-url is given.
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_client --requests 200 --concurrency 20
+    python -m benchmarks.bench_llm_client --throttle-rate 0.1   # exercise 429 retries
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+import structlog
+
+# Placeholder credentials so app settings load without a real Supabase project
+for _name, _value in {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_ANON_KEY": "bench",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench",
+    "SUPABASE_JWT_SECRET": "bench",
+    "GROQ_API_KEY": "bench",
+    "RAZORPAY_KEY_ID": "bench",
+    "RAZORPAY_KEY_SECRET": "bench",
+    "RAZORPAY_WEBHOOK_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from app.core.metrics import metrics
+from app.services.llm_client import LLMClient, LLMError
+
+# Per-request info logs would drown the report; retry warnings still show
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful AI assistant."},
+    {"role": "user", "content": "Summarize revenue trends."}
+]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_stub(args) -> subprocess.Popen:
+    """Launch the stub server and wait until it accepts connections"""
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.llm_stub_server",
+        "--port", str(args.port),
+        "--ttft-ms", str(args.ttft_ms),
+        "--token-ms", str(args.token_ms),
+        "--tokens", str(args.tokens),
+        "--throttle-rate", str(args.throttle_rate),
+        "--error-rate", str(args.error_rate)
+    ])
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", args.port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("Stub server did not start")
+
+def make_client(base_url: str) -> LLMClient:
+    return LLMClient(base_url=base_url, api_key="bench", model="stub", retry_base_seconds=0.05, retry_max_seconds=1.0)
+
+async def one_request(client: LLMClient, stream: bool):
+    """Return (first_token_ms, total_ms) or None on failure"""
+    start = time.perf_counter()
+    first_token: Optional[float] = None
+    try:
+        if stream:
+            async for _ in client.stream(MESSAGES):
+                if first_token is None:
+                    first_token = (time.perf_counter() - start) * 1000
+        else:
+            await client.complete(MESSAGES)
+    except LLMError:
+        return None
+    total = (time.perf_counter() - start) * 1000
+    return (first_token if first_token is not None else total), total
+
+async def run_mode(base_url: str, mode: str, requests: int, concurrency: int, stream: bool):
+    shared = make_client(base_url) if mode == "shared" else None
+    semaphore = asyncio.Semaphore(concurrency)
+    retries_before = metrics.get("llm.retries")
+
+    async def task():
+        async with semaphore:
+            if shared is not None:
+                return await one_request(shared, stream)
+            client = make_client(base_url)
+            try:
+                return await one_request(client, stream)
+            finally:
+                await client.close()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(task() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    if shared is not None:
+        await shared.close()
+
+    completed = [result for result in results if result is not None]
+    return {
+        "mode": mode,
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "retries": metrics.get("llm.retries") - retries_before,
+        "throughput": len(completed) / elapsed,
+        "ttft": np.array([result[0] for result in completed]),
+        "total": np.array([result[1] for result in completed])
+    }
+
+def report(result) -> List[str]:
+    if not result["completed"]:
+        return [f"  {result['mode']:<12} no successful requests ({result['failed']} failed)"]
+    ttft50, ttft95 = np.percentile(result["ttft"], [50, 95])
+    total50, total95 = np.percentile(result["total"], [50, 95])
+    return [
+        f"  {result['mode']:<12} ttft p50={ttft50:.1f}ms p95={ttft95:.1f}ms  "
+        f"total p50={total50:.1f}ms p95={total95:.1f}ms  "
+        f"{result['throughput']:.1f} req/s  failed={result['failed']} retries={result['retries']:.0f}"
+    ]
+
+async def run(args, base_url: str):
+    # Warm up the stub and the shared pool
+    await run_mode(base_url, "shared", args.concurrency, args.concurrency, not args.no_stream)
+
+    results = []
+    for mode in ("shared", "per-request"):
+        results.append(await run_mode(base_url, mode, args.requests, args.concurrency, not args.no_stream))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pooled LLM client against a local stub")
+    parser.add_argument("--base-url", default=None, help="use an already running server instead of the stub")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--no-stream", action="store_true", help="measure complete() instead of stream()")
+    parser.add_argument("--ttft-ms", type=float, default=150.0)
+    parser.add_argument("--token-ms", type=float, default=10.0)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="allowed p95 time-to-first-token overhead")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        args.port = args.port or free_port()
+        process = start_stub(args)
+        base_url = f"http://127.0.0.1:{args.port}/v1"
+
+    try:
+        results = asyncio.run(run(args, base_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(
+        f"LLM client: {args.requests} requests, concurrency {args.concurrency}, "
+        f"{'complete' if args.no_stream else 'stream'}, stub ttft={args.ttft_ms}ms"
+    )
+    for result in results:
+        for line in report(result):
+            print(line)
+
+    shared = results[0]
+    # Latency budgets only hold against an undisturbed stub; injected faults just report retries
+    if args.base_url is not None or args.throttle_rate or args.error_rate or not shared["completed"]:
+        return
+    # Non-streaming answers arrive only after the stub has produced every token
+    expected = args.ttft_ms if not args.no_stream else args.ttft_ms + args.token_ms * (args.tokens - 1)
+    overhead = np.percentile(shared["ttft"], 95) - expected
+    if overhead < args.budget_ms and shared["failed"] == 0:
+        print(f"✅ shared client p95 ttft overhead {overhead:.1f}ms under {args.budget_ms}ms budget")
+    else:
+        print(f"❌ shared client p95 ttft overhead {overhead:.1f}ms or {shared['failed']} failures over budget")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark MMR diversity selection over a typical hybrid-search candidate pool.
+
+Run from the backend directory:
+    python -m benchmarks.bench_mmr --candidates 100 --k 5
+"""
+
+import argparse
+import time
+import numpy as np
+from app.services.mmr import mmr_select
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MMR selection latency")
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    query = rng.standard_normal(args.dim).astype(np.float32)
+    candidates = rng.standard_normal((args.candidates, args.dim)).astype(np.float32)
+
+    # Warm up BLAS and allocator
+    for _ in range(50):
+        mmr_select(query, candidates, args.k, args.lambda_mult)
+
+    timings = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        mmr_select(query, candidates, args.k, args.lambda_mult)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    print(f"MMR: {args.candidates} candidates x {args.dim} dims, k={args.k}, lambda={args.lambda_mult}")
+    print(f"  mean={timings.mean():.3f}ms  p50={p50:.3f}ms  p95={p95:.3f}ms  p99={p99:.3f}ms")
+
+    if p50 < args.budget_ms:
+        print(f"✅ p50 under {args.budget_ms}ms budget")
+    else:
+        print(f"❌ p50 over {args.budget_ms}ms budget")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible chat completions API (Groq), for offline
+latency and throughput tests of app.services.llm_client.
+
+Serves POST /v1/chat/completions with fixed time-to-first-token and per-token
+delays, streaming as server-sent events when "stream" is true. A fraction of
+requests can be rejected with 429 + Retry-After or 503 to exercise retries.
+
+Run from the backend directory:
+    python -m benchmarks.llm_stub_server --port 8100 --ttft-ms 150 --token-ms 10
+Then point the app at it with LLM_BASE_URL=http://127.0.0.1:8100/v1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = (
+    "Revenue grew steadily across the last four quarters, driven mainly by recurring "
+    "subscriptions, while operating costs stayed flat and margins widened as a result."
+)
+
+def create_app(ttft_ms: float, token_ms: float, tokens: int, throttle_rate: float, error_rate: float, retry_after: float) -> FastAPI:
+    app = FastAPI()
+    words = (ANSWER.split(" ") * (tokens // len(ANSWER.split(" ")) + 1))[:tokens]
+    rng = random.Random(42)
+
+    def chunk(model: str, delta: dict, finish_reason=None) -> str:
+        body = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(body)}\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        model = payload.get("model", "stub")
+
+        roll = rng.random()
+        if roll < throttle_rate:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"Retry-After": str(retry_after)}
+            )
+        if roll < throttle_rate + error_rate:
+            return JSONResponse({"error": {"message": "Service unavailable"}}, status_code=503)
+
+        if payload.get("stream"):
+            async def events():
+                await asyncio.sleep(ttft_ms / 1000)
+                for index, word in enumerate(words):
+                    if index:
+                        await asyncio.sleep(token_ms / 1000)
+                    yield chunk(model, {"content": word if index == 0 else " " + word})
+                yield chunk(model, {}, finish_reason="stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep((ttft_ms + token_ms * (len(words) - 1)) / 1000)
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)}
+        }
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft-ms", type=float, default=150.0)
+    parser.add_argument("--token-ms", type=float, default=10.0)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After seconds sent with 429")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(
+        create_app(args.ttft_ms, args.token_ms, args.tokens, args.throttle_rate, args.error_rate, args.retry_after),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
+
+if __name__ == "__main__":
+    main()
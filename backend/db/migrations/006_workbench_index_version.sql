@@ -0,0 +1,4 @@
+-- 006_workbench_index_version.sql
+-- Monotonic per-workbench counter bumped whenever its chunks change.
+-- Retrieval caches key on it so they stay correct after re-indexing.
+alter table workbench add column if not exists index_version bigint not null default 0;
@@ -0,0 +1,4 @@
+-- 007_workbench_chunks_seq.sql
+-- Insertion sequence so in-process indexes can fetch only chunks added since their last load.
+alter table workbench_chunks add column if not exists chunk_seq bigserial;
+create index if not exists workbench_chunks_workbench_seq_idx on workbench_chunks(workbench_id, chunk_seq);
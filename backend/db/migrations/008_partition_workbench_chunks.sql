@@ -0,0 +1,186 @@
+-- 008_partition_workbench_chunks.sql
+-- Rebuild workbench_chunks as a LIST-partitioned table with one partition per workbench.
+--   * Per-workbench queries (WHERE workbench_id = $n) prune to a single partition.
+--   * The HNSW index declared on the parent is created on every partition, so each
+--     workbench gets its own small vector index instead of one global ivfflat.
+--   * Chunks carry no foreign keys, so deleting a workbench touches only its metadata rows;
+--     its partition is detached concurrently and dropped later by the maintenance sweep
+--     (app/workers/partition_maintenance.py). User-facing deletes neither scan the
+--     partition nor take an ACCESS EXCLUSIVE lock on the parent. A chunk still cannot
+--     name a missing workbench: without its partition the insert has nowhere to go.
+--   * Deleting a single file deletes its chunks from a trigger, skipped when the whole
+--     workbench is being deleted.
+--   * Partitions are reachable through the REST API like any public table, so each one
+--     gets row level security with no policies and no grants to the API roles; reads
+--     through the parent still apply the parent's policies.
+-- There is no default partition: DETACH PARTITION CONCURRENTLY is not allowed with one,
+-- and the workbench insert trigger creates each partition before any chunk can reference it.
+-- Run in a maintenance window: the copy below takes an exclusive lock on the old table.
+
+begin;
+
+alter table workbench_chunks rename to workbench_chunks_unpartitioned;
+alter index if exists workbench_chunks_embedding_ivfflat rename to workbench_chunks_unpartitioned_embedding_ivfflat;
+alter index if exists workbench_chunks_workbench_seq_idx rename to workbench_chunks_unpartitioned_workbench_seq_idx;
+
+create sequence if not exists workbench_chunks_chunk_seq;
+select setval(
+  'workbench_chunks_chunk_seq',
+  coalesce((select max(chunk_seq) from workbench_chunks_unpartitioned), 0) + 1,
+  false
+);
+
+create table workbench_chunks (
+  id uuid not null default gen_random_uuid(),
+  workbench_id uuid not null,
+  file_id uuid,
+  chunk_id text,
+  content text not null,
+  metadata jsonb,
+  embedding vector(1536),  -- adjust dims to embedding model used
+  chunk_seq bigint not null default nextval('workbench_chunks_chunk_seq'),
+  primary key (workbench_id, id)
+) partition by list (workbench_id);
+
+alter sequence workbench_chunks_chunk_seq owned by workbench_chunks.chunk_seq;
+
+-- Indexes declared on the parent are created on every partition
+create index workbench_chunks_workbench_seq_idx on workbench_chunks(workbench_id, chunk_seq);
+create index workbench_chunks_id_idx on workbench_chunks(id);
+create index workbench_chunks_file_id_idx on workbench_chunks(file_id);
+create index workbench_chunks_embedding_hnsw on workbench_chunks using hnsw (embedding vector_cosine_ops);
+
+create or replace function workbench_chunks_partition_name(p_workbench_id uuid)
+returns text language sql immutable as $$
+  select 'workbench_chunks_' || replace(p_workbench_id::text, '-', '')
+$$;
+
+-- Create the partition for a workbench. Workbench rows are inserted by the API roles, which
+-- do not own workbench_chunks, so this runs as its owner (security definer) with a pinned
+-- search_path.
+create or replace function ensure_workbench_chunks_partition(p_workbench_id uuid)
+returns void language plpgsql
+security definer set search_path = public, pg_temp as $$
+declare
+  partition_name text := workbench_chunks_partition_name(p_workbench_id);
+begin
+  if to_regclass(partition_name) is not null then
+    return;
+  end if;
+
+  execute format('create table %I (like workbench_chunks including defaults including constraints)', partition_name);
+  execute format('alter table %I enable row level security', partition_name);
+  execute format('revoke all on table %I from public, anon, authenticated', partition_name);
+  execute format(
+    'alter table workbench_chunks attach partition %I for values in (%L)',
+    partition_name, p_workbench_id
+  );
+end;
+$$;
+
+create or replace function workbench_chunks_partition_on_insert()
+returns trigger language plpgsql
+security definer set search_path = public, pg_temp as $$
+begin
+  perform ensure_workbench_chunks_partition(new.id);
+  return new;
+end;
+$$;
+
+create trigger workbench_chunks_partition_create
+  after insert on workbench
+  for each row execute function workbench_chunks_partition_on_insert();
+
+-- Foreign keys used to cascade file deletes to chunks. When the file goes because its
+-- workbench is being deleted, the workbench row is already gone and the sweep drops the
+-- whole partition instead.
+create or replace function workbench_chunks_delete_file_chunks()
+returns trigger language plpgsql
+security definer set search_path = public, pg_temp as $$
+begin
+  if exists (select 1 from workbench where id = old.workbench_id) then
+    delete from workbench_chunks where workbench_id = old.workbench_id and file_id = old.id;
+  end if;
+  return old;
+end;
+$$;
+
+create trigger workbench_chunks_file_delete
+  after delete on workbench_files
+  for each row execute function workbench_chunks_delete_file_chunks();
+
+-- Partitions whose workbench has been deleted, for the maintenance sweep to detach
+-- concurrently and drop. detach_pending marks a concurrent detach that was interrupted
+-- and must be finished with DETACH PARTITION ... FINALIZE.
+create or replace function orphaned_workbench_chunks_partitions()
+returns table (partition_name text, detach_pending boolean) language sql stable
+set search_path = public, pg_temp as $$
+  select c.relname::text, i.inhdetachpending
+  from pg_inherits i
+  join pg_class c on c.oid = i.inhrelid
+  where i.inhparent = 'workbench_chunks'::regclass
+    and not exists (
+      select 1 from workbench w where workbench_chunks_partition_name(w.id) = c.relname
+    )
+$$;
+
+-- Security definer functions run as their owner: make that the table owner, and keep all
+-- of these off the API roles
+do $$
+declare
+  owner_role text := (
+    select tableowner from pg_tables where schemaname = 'public' and tablename = 'workbench_chunks'
+  );
+begin
+  execute format('alter function ensure_workbench_chunks_partition(uuid) owner to %I', owner_role);
+  execute format('alter function workbench_chunks_partition_on_insert() owner to %I', owner_role);
+  execute format('alter function workbench_chunks_delete_file_chunks() owner to %I', owner_role);
+end;
+$$;
+
+revoke execute on function ensure_workbench_chunks_partition(uuid) from public, anon, authenticated;
+revoke execute on function workbench_chunks_partition_on_insert() from public, anon, authenticated;
+revoke execute on function workbench_chunks_delete_file_chunks() from public, anon, authenticated;
+revoke execute on function orphaned_workbench_chunks_partitions() from public, anon, authenticated;
+
+-- Create partitions for existing workbenches and copy their chunks across
+select ensure_workbench_chunks_partition(id) from workbench;
+
+insert into workbench_chunks (id, workbench_id, file_id, chunk_id, content, metadata, embedding, chunk_seq)
+select id, workbench_id, file_id, chunk_id, content, metadata, embedding, chunk_seq
+from workbench_chunks_unpartitioned
+where workbench_id is not null;
+
+drop table workbench_chunks_unpartitioned;
+
+-- RLS Policies for workbench_chunks (recreated on the partitioned parent)
+alter table workbench_chunks enable row level security;
+
+create policy "workbench_chunks_select" on workbench_chunks for select using (
+  exists (
+    select 1 from workbench w
+    where w.id = workbench_chunks.workbench_id
+    and (w.owner_user_id = auth.uid() or w.id in (
+      select wm.workbench_id from workbench_members wm where wm.user_id = auth.uid()
+    ))
+  )
+);
+
+create policy "workbench_chunks_insert" on workbench_chunks for insert with check (
+  exists (
+    select 1 from workbench w
+    where w.id = workbench_chunks.workbench_id
+    and (w.owner_user_id = auth.uid() or w.id in (
+      select wm.workbench_id from workbench_members wm
+      where wm.user_id = auth.uid() and wm.role in ('owner', 'editor')
+    ))
+  )
+);
+
+create policy "workbench_chunks_update" on workbench_chunks for update using (true);
+
+create policy "workbench_chunks_delete" on workbench_chunks for delete using (
+  exists (select 1 from workbench w where w.id = workbench_chunks.workbench_id and w.owner_user_id = auth.uid())
+);
+
+commit;
@@ -0,0 +1,12 @@
+-- 009_search_filter_indexes.sql
+-- Indexes backing structured retrieval filters (RAGService SearchFilters).
+--   * metadata @> '{...}' containment uses a GIN jsonb_path_ops index, declared on the
+--     partitioned parent so every per-workbench partition gets one.
+--   * Upload-date and file-type filters semi-join workbench_files on (workbench_id, created_at).
+-- file_id filters use workbench_chunks_file_id_idx from 008.
+
+create index if not exists workbench_chunks_metadata_gin
+  on workbench_chunks using gin (metadata jsonb_path_ops);
+
+create index if not exists workbench_files_workbench_created_idx
+  on workbench_files(workbench_id, created_at);
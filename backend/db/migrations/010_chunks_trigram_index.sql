@@ -0,0 +1,10 @@
+-- 010_chunks_trigram_index.sql
+-- Trigram GIN index for identifier lookups (invoice numbers, GL codes, exact figures).
+-- Serves RAGService identifier search: `content ILIKE ANY(...)` substring matches and the
+-- `<%` word-similarity fallback both use it instead of scanning every chunk.
+-- Declared on the partitioned parent, so each workbench partition gets its own index.
+
+create extension if not exists pg_trgm;
+
+create index if not exists workbench_chunks_content_trgm
+  on workbench_chunks using gin (content gin_trgm_ops);
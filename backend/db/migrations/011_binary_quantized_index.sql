@@ -0,0 +1,9 @@
+-- 011_binary_quantized_index.sql
+-- HNSW index over 1-bit sign codes of each embedding (pgvector >= 0.7).
+-- Serves the first stage of RAGService's binary-quantized search for very large
+-- workbenches: candidates are ordered by Hamming distance (`<~>`) on 192-byte codes
+-- instead of full 6 KB vectors, then reranked by exact cosine distance.
+-- Declared on the partitioned parent, so each workbench partition gets its own index.
+
+create index if not exists workbench_chunks_embedding_bq_hnsw
+  on workbench_chunks using hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops);
@@ -0,0 +1,10 @@
+-- 012_session_conversation_memory.sql
+-- Rolling conversation memory kept on the session row (ConversationMemoryStore).
+--   * memory_turns:            the most recent turns verbatim, [{"role", "content"}, ...]
+--   * memory_summary:          summary of every older turn, updated as turns fall out of memory_turns
+--   * memory_summarized_turns: how many turns the summary covers
+-- The chat path already reads the session row, so prompts get history without reading message rows.
+
+alter table session add column if not exists memory_turns jsonb not null default '[]'::jsonb;
+alter table session add column if not exists memory_summary text not null default '';
+alter table session add column if not exists memory_summarized_turns integer not null default 0;
@@ -0,0 +1,8 @@
+-- 013_workbench_index_lsn.sql
+-- Primary WAL position written just after each index_version bump (IndexVersionTracker.bump).
+-- A read replica whose replay LSN has reached it has the bump and every chunk stored before it,
+-- so results it returns can be cached under the new index_version. Until then reads for the
+-- workbench go to the primary.
+--   * NULL:               no bump since this migration; replicas within the lag limit are fine
+--   * FFFFFFFF/FFFFFFFF:  bump committed, position not yet recorded; primary only
+alter table workbench add column if not exists index_lsn pg_lsn;